@@ -0,0 +1,150 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+import cv2
+import numpy as np
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(RAIZ)
+from cliente_inferencia import ClienteInferencia, codificar_frame
+from procesamiento import draw_boxes_on_frame
+from servidor_stub import iniciar_servidor_stub
+from vista_previa import VistaPrevia
+
+# Benchmark reproducible del camino captura -> codificación -> inferencia -> dibujo -> visualización.
+# Usa un video grabado o las imágenes de img/ en lugar de la cámara y un servidor stub local en
+# lugar de Roboflow. El reporte JSON se puede comparar con uno anterior para detectar regresiones.
+
+ETAPAS = ['cap.read', 'cv2.imencode', 'http', 'draw_boxes_on_frame', 'VistaPrevia.mostrar']
+
+class CapturaImagenes:
+    """Imita a cv2.VideoCapture devolviendo en bucle las imágenes de una carpeta"""
+
+    def __init__(self, rutas, tamano=(640, 480)):
+        self.frames = [cv2.resize(cv2.imread(ruta), tamano) for ruta in rutas]
+        self.indice = 0
+
+    def read(self):
+        frame = self.frames[self.indice % len(self.frames)].copy()
+        self.indice += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+def abrir_fuente(video):
+    if video:
+        return cv2.VideoCapture(video)
+    rutas = sorted(glob.glob(os.path.join(RAIZ, 'img', '*.jpg')))
+    if not rutas:
+        raise ValueError("No hay imágenes en img/ y no se indicó un video.")
+    return CapturaImagenes(rutas)
+
+def crear_vista(ancho_max, alto_max):
+    """Función que devuelve la VistaPrevia de la interfaz sobre un Label oculto, o sin Tk si no hay pantalla"""
+    try:
+        import tkinter as tk
+        raiz = tk.Tk()
+        raiz.withdraw()
+        return VistaPrevia(tk.Label(raiz), ancho_max, alto_max)
+    except Exception:
+        print("Sin pantalla para Tk: la etapa VistaPrevia.mostrar mide la conversión sin PhotoImage.paste.")
+        return VistaPrevia(None, ancho_max, alto_max)
+
+def resumen_etapa(tiempos):
+    ms = np.array(tiempos) * 1000
+    return {
+        'media_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+def ejecutar(args):
+    servidor, url = iniciar_servidor_stub(latencia=args.latencia_stub)
+    cliente = ClienteInferencia(url, 'benchmark', reintentos=0)
+    cap = abrir_fuente(args.video)
+    vista = crear_vista(args.ancho_vista, args.alto_vista)
+    tiempos = {etapa: [] for etapa in ETAPAS}
+
+    def medir(etapa, funcion, *parametros):
+        inicio = time.perf_counter()
+        resultado = funcion(*parametros)
+        tiempos[etapa].append(time.perf_counter() - inicio)
+        return resultado
+
+    inicio_total = time.perf_counter()
+    for i in range(args.calentamiento + args.frames):
+        if i == args.calentamiento:
+            # Descartar las iteraciones de calentamiento (conexión inicial, cachés de OpenCV...)
+            tiempos = {etapa: [] for etapa in ETAPAS}
+            inicio_total = time.perf_counter()
+
+        ret, frame = medir('cap.read', cap.read)
+        if not ret:
+            break
+        img_bytes = medir('cv2.imencode', codificar_frame, frame)
+        result = medir('http', cliente.infer, img_bytes, 'benchmark/1')
+        medir('draw_boxes_on_frame', draw_boxes_on_frame, frame, result['predictions'] if result else [])
+        medir('VistaPrevia.mostrar', vista.mostrar, frame)
+    duracion = time.perf_counter() - inicio_total
+
+    cap.release()
+    cliente.close()
+    servidor.shutdown()
+
+    frames = len(tiempos['cap.read'])
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'fuente': args.video or 'img/',
+        'frames': frames,
+        'latencia_stub_ms': args.latencia_stub * 1000,
+        'fps': frames / duracion if duracion else 0.0,
+        'etapas': {etapa: resumen_etapa(t) for etapa, t in tiempos.items() if t},
+    }
+
+def comparar(reporte, ruta_base, tolerancia):
+    """Función para comparar el p50 de cada etapa con un reporte anterior; devuelve las regresiones"""
+    with open(ruta_base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    regresiones = []
+    for etapa, datos in reporte['etapas'].items():
+        anterior = base['etapas'].get(etapa)
+        if anterior and datos['p50_ms'] > anterior['p50_ms'] * (1 + tolerancia):
+            regresiones.append(f"{etapa}: p50 {anterior['p50_ms']:.2f} ms -> {datos['p50_ms']:.2f} ms")
+    return regresiones
+
+parser = argparse.ArgumentParser(description="Benchmark del pipeline de captura e inferencia")
+parser.add_argument('--video', help="Video grabado a usar como fuente (por defecto, las imágenes de img/)")
+parser.add_argument('--frames', type=int, default=200, help="Frames medidos")
+parser.add_argument('--calentamiento', type=int, default=10, help="Frames iniciales que no se miden")
+parser.add_argument('--latencia-stub', type=float, default=0.0, help="Latencia simulada del servidor stub en segundos")
+parser.add_argument('--ancho-vista', type=int, help="Ancho máximo de la vista previa (por defecto, el del frame)")
+parser.add_argument('--alto-vista', type=int, help="Alto máximo de la vista previa (por defecto, el del frame)")
+parser.add_argument('--base', help="Reporte anterior con el que comparar")
+parser.add_argument('--tolerancia', type=float, default=0.2, help="Aumento relativo del p50 que se considera regresión")
+parser.add_argument('--salida', default='resultados-benchmark', help="Carpeta donde guardar el reporte")
+args = parser.parse_args()
+
+reporte = ejecutar(args)
+
+os.makedirs(args.salida, exist_ok=True)
+ruta_reporte = os.path.join(args.salida, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+with open(ruta_reporte, 'w', encoding='utf-8') as f:
+    json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+print(f"{'Etapa':<22}{'media':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+for etapa, datos in reporte['etapas'].items():
+    print(f"{etapa:<22}{datos['media_ms']:>9.2f}{datos['p50_ms']:>9.2f}{datos['p95_ms']:>9.2f}{datos['p99_ms']:>9.2f}")
+print(f"{reporte['frames']} frames a {reporte['fps']:.1f} FPS. Reporte guardado en {ruta_reporte}")
+
+if args.base:
+    regresiones = comparar(reporte, args.base, args.tolerancia)
+    for regresion in regresiones:
+        print(f"REGRESIÓN {regresion}")
+    sys.exit(1 if regresiones else 0)
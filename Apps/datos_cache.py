@@ -0,0 +1,237 @@
+import glob
+import json
+import math
+import os
+import time
+import tensorflow as tf
+
+# Conjunto de datos en caché para el entrenamiento: cada imagen se decodifica y se
+# redimensiona una sola vez, se guarda en shards TFRecord compactos (JPEG ya
+# redimensionado) y en cada época se lee en paralelo con tf.data
+
+TAMANO_IMG = 224
+VALIDATION_SPLIT = 0.15
+EXTENSIONES = ('.jpg', '.jpeg', '.png', '.bmp')
+IMAGENES_POR_SHARD = 1000
+VERSION_SHARDS = 2  # Subir al cambiar el formato o las etiquetas de los shards para regenerarlos
+
+# Clases de la cabeza de 6 salidas (mismo orden que CLASES_MODELO en backends_inferencia.py)
+CLASES = ['cardboard', 'glass', 'metal', 'paper', 'plastic', 'trash']
+
+# Nombres de carpeta de TrashNet, Garbage classification y TACO que no coinciden
+# con una de las 6 clases; cualquier otra carpeta desconocida va a 'trash'
+SINONIMOS = {
+    'carton': 'cardboard',
+    'broken glass': 'glass',
+    'glass jar': 'glass',
+    'brown-glass': 'glass',
+    'green-glass': 'glass',
+    'white-glass': 'glass',
+    'aluminium foil': 'metal',
+    'can': 'metal',
+    'pop tab': 'metal',
+    'scrap metal': 'metal',
+    'paper bag': 'paper',
+    'bottle': 'plastic',
+    'bottle cap': 'plastic',
+    'cup': 'plastic',
+    'lid': 'plastic',
+    'other plastic': 'plastic',
+    'plastic bag & wrapper': 'plastic',
+    'plastic container': 'plastic',
+    'plastic utensils': 'plastic',
+    'straw': 'plastic',
+    'squeezable tube': 'plastic',
+}
+
+def clase_canonica(nombre_carpeta):
+    """Función para llevar el nombre de carpeta de cualquier dataset a una de las 6 clases"""
+    nombre = nombre_carpeta.strip().lower()
+    if nombre in CLASES:
+        return nombre
+    if nombre.rstrip('s') in CLASES:  # 'metals', 'plastics'...
+        return nombre.rstrip('s')
+    if nombre not in SINONIMOS:
+        print(f"Carpeta '{nombre_carpeta}' sin clase conocida: se asigna a 'trash'")
+    return SINONIMOS.get(nombre, 'trash')
+
+def listar_imagenes(directorio, subset, validation_split=VALIDATION_SPLIT):
+    """Función para listar rutas y etiquetas con la misma partición que flow_from_directory.
+
+    Las etiquetas son índices de CLASES, sea cual sea el nombre de carpeta del dataset.
+    """
+    clases = sorted(d for d in os.listdir(directorio) if os.path.isdir(os.path.join(directorio, d)))
+    rutas = []
+    etiquetas = []
+    for clase in clases:
+        indice = CLASES.index(clase_canonica(clase))
+        archivos = sorted(
+            os.path.join(raiz, archivo)
+            for raiz, _, archivos in os.walk(os.path.join(directorio, clase))
+            for archivo in archivos
+            if archivo.lower().endswith(EXTENSIONES)
+        )
+        # ImageDataGenerator toma el primer 15% de cada clase para validación y el resto para entrenamiento
+        corte = int(validation_split * len(archivos))
+        seleccion = archivos[:corte] if subset == 'validation' else archivos[corte:]
+        rutas += seleccion
+        etiquetas += [indice] * len(seleccion)
+    return rutas, etiquetas, clases
+
+def _ruta_info(destino, subset):
+    return os.path.join(destino, f"{subset}-info.json")
+
+def construir_shards(directorio, destino, subset, tamano_img=TAMANO_IMG):
+    """Función para decodificar y redimensionar un dataset una sola vez y guardarlo en shards TFRecord.
+
+    Si los shards ya existen no se vuelven a construir; basta con borrar la
+    carpeta de destino para regenerarlos.
+    """
+    if os.path.exists(_ruta_info(destino, subset)) and leer_info(destino, subset).get('version') == VERSION_SHARDS:
+        return
+    os.makedirs(destino, exist_ok=True)
+    for anterior in glob.glob(os.path.join(destino, f"{subset}-*.tfrecord")):
+        os.remove(anterior)
+    rutas, etiquetas, clases = listar_imagenes(directorio, subset)
+
+    def preparar(ruta, etiqueta):
+        imagen = tf.io.decode_image(tf.io.read_file(ruta), channels=3, expand_animations=False)
+        imagen = tf.image.resize(imagen, (tamano_img, tamano_img))
+        return tf.io.encode_jpeg(tf.cast(tf.round(imagen), tf.uint8), quality=95), etiqueta
+
+    ds = tf.data.Dataset.from_tensor_slices((rutas, etiquetas)).map(preparar, num_parallel_calls=tf.data.AUTOTUNE)
+
+    inicio = time.perf_counter()
+    escritor = None
+    for i, (jpeg, etiqueta) in enumerate(ds.as_numpy_iterator()):
+        if i % IMAGENES_POR_SHARD == 0:
+            if escritor:
+                escritor.close()
+            escritor = tf.io.TFRecordWriter(os.path.join(destino, f"{subset}-{i // IMAGENES_POR_SHARD:05d}.tfrecord"))
+        ejemplo = tf.train.Example(features=tf.train.Features(feature={
+            'imagen': tf.train.Feature(bytes_list=tf.train.BytesList(value=[jpeg])),
+            'etiqueta': tf.train.Feature(int64_list=tf.train.Int64List(value=[int(etiqueta)])),
+        }))
+        escritor.write(ejemplo.SerializeToString())
+    if escritor:
+        escritor.close()
+
+    # El archivo de información se escribe al final: su presencia indica que los shards están completos
+    with open(_ruta_info(destino, subset), 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': VERSION_SHARDS,
+            'num_ejemplos': len(rutas),
+            'carpetas': {clase: clase_canonica(clase) for clase in clases},
+            'por_clase': [etiquetas.count(i) for i in range(len(CLASES))],
+            'tamano_img': tamano_img,
+        }, f)
+    print(f"Shards de {directorio} ({subset}): {len(rutas)} imágenes en {time.perf_counter() - inicio:.1f} s")
+
+def leer_info(destino, subset):
+    with open(_ruta_info(destino, subset), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def firma_fuentes(destinos, subset):
+    """Función que identifica los shards de varias fuentes: versión, clases, sinónimos y la
+    información de cada fuente (carpetas, ejemplos por clase), para invalidar cachés derivadas"""
+    return {
+        'version': VERSION_SHARDS,
+        'clases': CLASES,
+        'sinonimos': SINONIMOS,
+        'fuentes': {os.path.basename(os.path.normpath(destino)): leer_info(destino, subset) for destino in destinos},
+    }
+
+def capas_aumentacion():
+    """Función con las transformaciones aleatorias equivalentes al ImageDataGenerator de training.py"""
+    return tf.keras.Sequential([
+        tf.keras.layers.RandomRotation(40 / 360, fill_mode='nearest'),
+        tf.keras.layers.RandomTranslation(0.2, 0.2, fill_mode='nearest'),
+        tf.keras.layers.RandomZoom(0.2, fill_mode='nearest'),
+        tf.keras.layers.RandomFlip('horizontal'),
+    ])
+
+def leer_ejemplos(destino, subset, num_clases=len(CLASES)):
+    """Función que devuelve los registros de los shards sin decodificar y la función que los
+    convierte en (imagen normalizada, etiqueta one-hot); así se puede barajar antes de decodificar"""
+    archivos = sorted(glob.glob(os.path.join(destino, f"{subset}-*.tfrecord")))
+    descripcion = {
+        'imagen': tf.io.FixedLenFeature([], tf.string),
+        'etiqueta': tf.io.FixedLenFeature([], tf.int64),
+    }
+
+    def decodificar(registro):
+        ejemplo = tf.io.parse_single_example(registro, descripcion)
+        imagen = tf.cast(tf.io.decode_jpeg(ejemplo['imagen'], channels=3), tf.float32) / 255.0
+        return imagen, tf.one_hot(ejemplo['etiqueta'], num_clases)
+
+    return tf.data.TFRecordDataset(archivos, num_parallel_reads=tf.data.AUTOTUNE), decodificar
+
+def preparar_lotes(ds, batch_size, aumentar):
+    """Función para agrupar en lotes, aplicar la aumentación y hacer prefetch"""
+    ds = ds.batch(batch_size)
+    if aumentar:
+        # La aumentación se aplica por lotes, vectorizada, en lugar de imagen por imagen
+        aumentacion = capas_aumentacion()
+        ds = ds.map(lambda x, y: (aumentacion(x, training=True), y), num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+def cargar_shards(destino, subset, num_clases=len(CLASES), batch_size=32, aumentar=False, barajar=False):
+    """Función para leer los shards con lectura y decodificación en paralelo, aumentación y prefetch"""
+    ds, decodificar = leer_ejemplos(destino, subset, num_clases)
+    if barajar:
+        ds = ds.shuffle(2048, reshuffle_each_iteration=True)
+    return preparar_lotes(ds.map(decodificar, num_parallel_calls=tf.data.AUTOTUNE), batch_size, aumentar)
+
+def cargar_mezcla(destinos, subset, pesos=None, batch_size=32, aumentar=True):
+    """Función para intercalar varios datasets con pesos configurables y una época de longitud conocida.
+
+    Cada fuente se repite y se baraja por separado y tf.data elige la fuente de
+    cada ejemplo según `pesos` (por defecto, proporcional al tamaño de cada
+    dataset). Devuelve el dataset infinito y los pasos por época, calculados
+    para que una época cubra tantos ejemplos como tiene el corpus completo.
+    """
+    num_ejemplos = [leer_info(destino, subset)['num_ejemplos'] for destino in destinos]
+    if pesos is None:
+        pesos = num_ejemplos
+    total_pesos = float(sum(pesos))
+
+    fuentes = []
+    for destino in destinos:
+        ds, decodificar = leer_ejemplos(destino, subset)
+        ds = ds.shuffle(2048, reshuffle_each_iteration=True).repeat()
+        fuentes.append(ds.map(decodificar, num_parallel_calls=tf.data.AUTOTUNE))
+
+    mezcla = tf.data.Dataset.sample_from_datasets(fuentes, weights=[p / total_pesos for p in pesos])
+    pasos_por_epoca = math.ceil(sum(num_ejemplos) / batch_size)
+    return preparar_lotes(mezcla, batch_size, aumentar), pasos_por_epoca
+
+def pesos_clases(destinos, subset='training'):
+    """Función que calcula pesos por clase inversos a su frecuencia, para usar como class_weight"""
+    por_clase = [0] * len(CLASES)
+    for destino in destinos:
+        for i, cantidad in enumerate(leer_info(destino, subset)['por_clase']):
+            por_clase[i] += cantidad
+    total = sum(por_clase)
+    presentes = sum(1 for cantidad in por_clase if cantidad)
+    return {i: total / (presentes * cantidad) if cantidad else 0.0 for i, cantidad in enumerate(por_clase)}
+
+def medir_epoca(dataset, pasos=None):
+    """Función para medir cuánto tarda en recorrerse una época del pipeline de entrada"""
+    inicio = time.perf_counter()
+    lotes = 0
+    for _ in dataset.take(pasos) if pasos else dataset:
+        lotes += 1
+    return time.perf_counter() - inicio, lotes
+
+class TiempoEpoca(tf.keras.callbacks.Callback):
+    """Callback que registra y muestra la duración de cada época"""
+
+    def on_train_begin(self, logs=None):
+        self.tiempos = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._inicio = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.tiempos.append(time.perf_counter() - self._inicio)
+        print(f"Época {epoch + 1}: {self.tiempos[-1]:.1f} s")
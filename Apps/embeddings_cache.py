@@ -0,0 +1,99 @@
+import json
+import math
+import os
+import time
+import numpy as np
+import tensorflow as tf
+
+# Caché de embeddings del backbone congelado: el forward de ResNet50 se calcula una
+# sola vez por imagen (y por variante aumentada) y la cabeza Dense/Dropout se entrena
+# sobre esos vectores guardados en un array mapeado en memoria
+
+def calcular_embeddings(backbone, crear_dataset, destino, num_ejemplos, variantes=1, origen=None):
+    """Función para calcular (o reutilizar) los embeddings de un dataset.
+
+    crear_dataset(variante) debe devolver el dataset de imágenes sin barajar:
+    la variante 0 sin aumentación y las siguientes con aumentación aleatoria.
+    `origen` (datos JSON, por ejemplo firma_fuentes() de datos_cache) identifica
+    de dónde salen las imágenes y sus etiquetas: si cambia, la caché se recalcula
+    aunque el número de ejemplos coincida.
+    Devuelve el array de embeddings (np.memmap de solo lectura) y las etiquetas.
+    """
+    ruta_x = os.path.join(destino, 'embeddings.f32')
+    ruta_y = os.path.join(destino, 'etiquetas.npy')
+    ruta_info = os.path.join(destino, 'info.json')
+    dimension = backbone.output_shape[-1]
+    total = num_ejemplos * variantes
+    info = {'num_ejemplos': num_ejemplos, 'variantes': variantes, 'dimension': dimension, 'origen': origen}
+
+    if os.path.exists(ruta_info):
+        with open(ruta_info, 'r', encoding='utf-8') as f:
+            if json.load(f) == info:
+                return np.memmap(ruta_x, dtype=np.float32, mode='r', shape=(total, dimension)), np.load(ruta_y)
+
+    os.makedirs(destino, exist_ok=True)
+    inicio = time.perf_counter()
+    embeddings = np.memmap(ruta_x, dtype=np.float32, mode='w+', shape=(total, dimension))
+    etiquetas = np.zeros(total, dtype=np.int64)
+    posicion = 0
+    for variante in range(variantes):
+        for imagenes, y in crear_dataset(variante):
+            n = len(imagenes)
+            embeddings[posicion:posicion + n] = backbone.predict_on_batch(imagenes)
+            etiquetas[posicion:posicion + n] = np.argmax(y, axis=1)
+            posicion += n
+    embeddings.flush()
+    np.save(ruta_y, etiquetas)
+
+    # El archivo de información se escribe al final: su presencia indica que la caché está completa
+    with open(ruta_info, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    print(f"Embeddings de {destino}: {total} vectores en {time.perf_counter() - inicio:.1f} s")
+    return np.memmap(ruta_x, dtype=np.float32, mode='r', shape=(total, dimension)), etiquetas
+
+def pesos_por_ejemplo(num_por_fuente, pesos_fuentes=None, variantes=1):
+    """Función que reparte el peso de cada fuente entre sus ejemplos, en el orden en que
+    calcular_embeddings los guarda (cada variante con las fuentes concatenadas).
+
+    Con esas probabilidades, cada ejemplo sorteado viene de una fuente con la
+    misma frecuencia que en cargar_mezcla. Sin `pesos_fuentes` (proporcional
+    al tamaño) todos los ejemplos pesan lo mismo y se devuelve None.
+    """
+    if pesos_fuentes is None:
+        return None
+    pesos = np.concatenate([np.full(n, peso / n if n else 0.0) for n, peso in zip(num_por_fuente, pesos_fuentes)])
+    pesos = np.tile(pesos, variantes)
+    return pesos / pesos.sum()
+
+class LotesMemmap(tf.keras.utils.Sequence):
+    """Lotes de embeddings leídos directamente del array mapeado en memoria.
+
+    Con `probabilidades` (una por ejemplo, ver pesos_por_ejemplo) cada época
+    sortea con reemplazo tantos ejemplos como hay en el array, en lugar de
+    recorrerlos todos una vez.
+    """
+
+    def __init__(self, embeddings, etiquetas, num_clases=6, batch_size=32, barajar=False, probabilidades=None):
+        super().__init__()
+        self.embeddings = embeddings
+        self.etiquetas = etiquetas
+        self.num_clases = num_clases
+        self.batch_size = batch_size
+        self.barajar = barajar
+        self.probabilidades = probabilidades
+        self.indices = np.arange(len(etiquetas))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def __getitem__(self, i):
+        # Índices ordenados dentro del lote para leer el archivo de forma más secuencial
+        seleccion = np.sort(self.indices[i * self.batch_size:(i + 1) * self.batch_size])
+        return np.asarray(self.embeddings[seleccion]), np.eye(self.num_clases, dtype=np.float32)[self.etiquetas[seleccion]]
+
+    def on_epoch_end(self):
+        if self.probabilidades is not None:
+            self.indices = np.random.choice(len(self.etiquetas), size=len(self.etiquetas), p=self.probabilidades)
+        elif self.barajar:
+            np.random.shuffle(self.indices)
@@ -1,69 +1,125 @@
 import os
+import sys
+import json
+import time
+from datetime import datetime
 import numpy as np
-import tensorflow as tf
 from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from datos_cache import CLASES, construir_shards, cargar_shards
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from backends_inferencia import ModeloTFLite
 
 # Definir parámetros
 TAMANO_IMG = 224  # Tamaño de las imágenes ajustado para coincidir con el modelo
-BATCH_SIZE = 32   # Tamaño del lote para entrenamiento
+BATCH_SIZE = 32   # Tamaño del lote para la evaluación
+TAMANOS_LOTE_LATENCIA = [1, 8, 32]  # Tamaños de lote para medir latencia y rendimiento
+REPETICIONES_LATENCIA = 30          # Llamadas medidas por cada tamaño de lote
+DIRECTORIO_RESULTADOS = './resultados-evaluacion'
+
+# Modelo a evaluar (.h5 o .tflite), se puede pasar como argumento
+RUTA_MODELO = sys.argv[1] if len(sys.argv) > 1 else 'modelo_mejorado.h5'
 
 # Directorios de los datasets
-DIRECTORIO_TRASHNET = './dataset-original'
-DIRECTORIO_GARBAGE = './Garbage classification'
-DIRECTORIO_TACO = './TACO'
+DIRECTORIOS = {
+    'trashnet': './dataset-original',
+    'garbage': './Garbage classification',
+    'taco': './TACO',
+}
+DIRECTORIO_CACHE = './cache-datasets'  # Los mismos shards que usa training.py
 
-# Configurar generadores de datos
-datagen = ImageDataGenerator(
-    rescale=1./255,        # Normalizar imágenes
-    validation_split=0.15   # Separar 15% para validación
-)
+def percentil_ms(latencias, q):
+    return float(np.percentile(latencias, q) * 1000)
 
-# Cargar datos de validación para cada dataset con el tamaño correcto
-validacion_trashnet = datagen.flow_from_directory(
-    DIRECTORIO_TRASHNET,
-    target_size=(TAMANO_IMG, TAMANO_IMG),  # Tamaño ajustado
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
+def evaluar_dataset(modelo, dataset, matriz):
+    """Función para predecir un dataset completo y acumular su matriz de confusión"""
+    aciertos = 0
+    total = 0
+    for imagenes, etiquetas in dataset:
+        reales = np.argmax(etiquetas, axis=1)
+        predichas = np.argmax(modelo.predict_on_batch(imagenes), axis=1)
+        np.add.at(matriz, (reales, predichas), 1)
+        aciertos += int(np.sum(reales == predichas))
+        total += len(reales)
+    return {'imagenes': total, 'exactitud': aciertos / total if total else 0.0}
 
-validacion_garbage = datagen.flow_from_directory(
-    DIRECTORIO_GARBAGE,
-    target_size=(TAMANO_IMG, TAMANO_IMG),  # Tamaño ajustado
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
+def metricas_por_clase(matriz):
+    """Función para calcular precisión (precision) y exhaustividad (recall) de cada clase"""
+    metricas = {}
+    for i, clase in enumerate(CLASES):
+        verdaderos = int(matriz[i, i])
+        predichos = int(matriz[:, i].sum())
+        reales = int(matriz[i, :].sum())
+        metricas[clase] = {
+            'precision': verdaderos / predichos if predichos else 0.0,
+            'recall': verdaderos / reales if reales else 0.0,
+            'soporte': reales,
+        }
+    return metricas
 
-validacion_taco = datagen.flow_from_directory(
-    DIRECTORIO_TACO,
-    target_size=(TAMANO_IMG, TAMANO_IMG),  # Tamaño ajustado
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
+def perfil_latencia(modelo, imagenes):
+    """Función para medir latencia (p50/p95/p99) y rendimiento con varios tamaños de lote"""
+    perfil = {}
+    for tamano in TAMANOS_LOTE_LATENCIA:
+        lote = np.resize(imagenes, (tamano,) + imagenes.shape[1:])
+        modelo.predict_on_batch(lote)  # Calentamiento
+        latencias = []
+        for _ in range(REPETICIONES_LATENCIA):
+            inicio = time.perf_counter()
+            modelo.predict_on_batch(lote)
+            latencias.append(time.perf_counter() - inicio)
+        perfil[str(tamano)] = {
+            'p50_ms': percentil_ms(latencias, 50),
+            'p95_ms': percentil_ms(latencias, 95),
+            'p99_ms': percentil_ms(latencias, 99),
+            'imagenes_por_segundo': tamano * len(latencias) / sum(latencias),
+        }
+    return perfil
 
-# Función para convertir DirectoryIterator a tf.data.Dataset
-def convertir_a_dataset(directory_iterator):
-    def generator():
-        for batch in directory_iterator:
-            yield batch[0], batch[1]  # X (imágenes) e Y (etiquetas)
-    return tf.data.Dataset.from_generator(generator, output_signature=(
-        tf.TensorSpec(shape=(None, TAMANO_IMG, TAMANO_IMG, 3), dtype=tf.float32),
-        tf.TensorSpec(shape=(None, 6), dtype=tf.float32)))
+# Cargar el modelo guardado
+modelo_guardado = ModeloTFLite(RUTA_MODELO) if RUTA_MODELO.endswith('.tflite') else load_model(RUTA_MODELO)
 
-# Convertir cada DirectoryIterator a tf.data.Dataset
-ds_validacion_trashnet = convertir_a_dataset(validacion_trashnet)
-ds_validacion_garbage = convertir_a_dataset(validacion_garbage)
-ds_validacion_taco = convertir_a_dataset(validacion_taco)
+# Evaluar cada dataset de validación (lectura y decodificación en paralelo desde los shards)
+matriz = np.zeros((len(CLASES), len(CLASES)), dtype=np.int64)
+por_dataset = {}
+inicio = time.perf_counter()
+for nombre, directorio in DIRECTORIOS.items():
+    destino = os.path.join(DIRECTORIO_CACHE, nombre)
+    construir_shards(directorio, destino, 'validation', TAMANO_IMG)
+    dataset = cargar_shards(destino, 'validation', batch_size=BATCH_SIZE).as_numpy_iterator()
+    por_dataset[nombre] = evaluar_dataset(modelo_guardado, dataset, matriz)
+tiempo_evaluacion = time.perf_counter() - inicio
 
-# Combinar los datasets de validación
-validacion_combined = ds_validacion_trashnet.concatenate(ds_validacion_garbage).concatenate(ds_validacion_taco)
+# Perfil de latencia con imágenes reales de validación
+muestra, _ = next(cargar_shards(os.path.join(DIRECTORIO_CACHE, 'trashnet'), 'validation',
+                                batch_size=max(TAMANOS_LOTE_LATENCIA)).as_numpy_iterator())
 
-# Cargar el modelo guardado
-modelo_guardado = load_model('modelo_mejorado.h5')
+total = int(matriz.sum())
+reporte = {
+    'modelo': RUTA_MODELO,
+    'fecha': datetime.now().isoformat(timespec='seconds'),
+    'clases': CLASES,
+    'exactitud_global': float(np.trace(matriz) / total) if total else 0.0,  # Aciertos / total (accuracy)
+    'por_dataset': por_dataset,
+    'por_clase': metricas_por_clase(matriz),
+    'matriz_confusion': matriz.tolist(),  # Filas: clase real, columnas: clase predicha
+    'latencia': perfil_latencia(modelo_guardado, muestra),
+    'tiempo_evaluacion_s': tiempo_evaluacion,
+}
+
+# Guardar el reporte en JSON para comparar ejecuciones a lo largo del tiempo
+os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+ruta_reporte = os.path.join(DIRECTORIO_RESULTADOS, f"evaluacion-{datetime.now():%Y%m%d-%H%M%S}.json")
+with open(ruta_reporte, 'w', encoding='utf-8') as f:
+    json.dump(reporte, f, indent=2, ensure_ascii=False)
 
-# Evaluar el modelo en el conjunto de validación combinado
-resultado = modelo_guardado.evaluate(validacion_combined)
-print(f"Precisión del modelo guardado: {resultado[1] * 100:.2f}%")
\ No newline at end of file
+print(f"Exactitud del modelo guardado: {reporte['exactitud_global'] * 100:.2f}%")
+for nombre, datos in por_dataset.items():
+    print(f"  {nombre}: exactitud {datos['exactitud'] * 100:.2f}% ({datos['imagenes']} imágenes)")
+for clase, datos in reporte['por_clase'].items():
+    print(f"  {clase}: precision {datos['precision'] * 100:.1f}% | recall {datos['recall'] * 100:.1f}%")
+for tamano, datos in reporte['latencia'].items():
+    print(f"  Lote {tamano}: p50 {datos['p50_ms']:.1f} ms | p95 {datos['p95_ms']:.1f} ms | "
+          f"p99 {datos['p99_ms']:.1f} ms | {datos['imagenes_por_segundo']:.1f} img/s")
+print(f"Reporte guardado en {ruta_reporte}")
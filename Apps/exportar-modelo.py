@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+from datos_cache import construir_shards, cargar_shards
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from backends_inferencia import ModeloTFLite
+
+# Exporta modelo_mejorado.h5 a TFLite (float32, float16 e int8) y compara precisión
+# y latencia de cada variante con el modelo original sobre la partición de validación
+
+# Definir parámetros
+TAMANO_IMG = 224  # Tamaño de las imágenes ajustado para coincidir con el modelo
+BATCH_SIZE = 32   # Tamaño del lote para leer la validación
+RUTA_MODELO = 'modelo_mejorado.h5'
+CUANTIZACIONES = ['float32', 'float16', 'int8']  # Variantes a exportar
+MUESTRAS_CALIBRACION = 200   # Imágenes de validación para calibrar la cuantización int8
+MUESTRAS_LATENCIA = 50       # Imágenes sueltas (lote de 1) para medir la latencia
+
+# Directorios de los datasets
+DIRECTORIOS = {
+    'trashnet': './dataset-original',
+    'garbage': './Garbage classification',
+    'taco': './TACO',
+}
+DIRECTORIO_CACHE = './cache-datasets'  # Los mismos shards de validación que usa evaluacion-modelos.py
+
+for nombre, directorio in DIRECTORIOS.items():
+    construir_shards(directorio, os.path.join(DIRECTORIO_CACHE, nombre), 'validation', TAMANO_IMG)
+
+def lotes_validacion():
+    """Función que recorre una sola vez los lotes de validación de los tres datasets"""
+    for nombre in DIRECTORIOS:
+        yield from cargar_shards(os.path.join(DIRECTORIO_CACHE, nombre), 'validation',
+                                 batch_size=BATCH_SIZE).as_numpy_iterator()
+
+def dataset_representativo():
+    """Función que entrega imágenes de validación para calibrar la cuantización int8"""
+    entregadas = 0
+    for imagenes, _ in lotes_validacion():
+        for imagen in imagenes:
+            yield [imagen[np.newaxis].astype(np.float32)]
+            entregadas += 1
+            if entregadas >= MUESTRAS_CALIBRACION:
+                return
+
+def exportar(modelo, cuantizacion):
+    """Función para convertir el modelo Keras a TFLite con la cuantización indicada"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(modelo)
+    if cuantizacion == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif cuantizacion == 'int8':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = dataset_representativo
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    ruta = RUTA_MODELO.replace('.h5', f'_{cuantizacion}.tflite')
+    with open(ruta, 'wb') as f:
+        f.write(converter.convert())
+    return ruta
+
+def evaluar(modelo):
+    """Función para medir la precisión y la latencia (lote de 1) de un modelo"""
+    aciertos = 0
+    total = 0
+    muestras_latencia = []
+    for imagenes, etiquetas in lotes_validacion():
+        predicciones = modelo.predict_on_batch(imagenes)
+        aciertos += int(np.sum(np.argmax(predicciones, axis=1) == np.argmax(etiquetas, axis=1)))
+        total += len(imagenes)
+        for imagen in imagenes:
+            if len(muestras_latencia) < MUESTRAS_LATENCIA:
+                muestras_latencia.append(imagen)
+
+    latencias = []
+    modelo.predict_on_batch(muestras_latencia[0][np.newaxis])  # Calentamiento
+    for imagen in muestras_latencia:
+        inicio = time.perf_counter()
+        modelo.predict_on_batch(imagen[np.newaxis])
+        latencias.append(time.perf_counter() - inicio)
+
+    return aciertos / total, np.percentile(latencias, 50) * 1000, np.percentile(latencias, 95) * 1000
+
+# Cargar el modelo original
+modelo_keras = load_model(RUTA_MODELO)
+
+resultados = [(RUTA_MODELO, os.path.getsize(RUTA_MODELO)) + evaluar(modelo_keras)]
+for cuantizacion in CUANTIZACIONES:
+    ruta = exportar(modelo_keras, cuantizacion)
+    print(f"Modelo exportado: {ruta}")
+    resultados.append((ruta, os.path.getsize(ruta)) + evaluar(ModeloTFLite(ruta)))
+
+# Mostrar la comparación de precisión frente a latencia
+print(f"{'Modelo':<36}{'Tamaño (MB)':>12}{'Precisión':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+for ruta, tamano, precision, p50, p95 in resultados:
+    print(f"{ruta:<36}{tamano / 1e6:>12.1f}{precision * 100:>11.2f}%{p50:>10.1f}{p95:>10.1f}")
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+
+# Mide en frío el arranque de Deteccion-Capturas.py: lo lanza varias veces, cada una en un proceso
+# nuevo que se cierra solo al mostrar el primer frame, y compara la mediana del tiempo hasta ese
+# frame (contado desde el lanzamiento, con el arranque del intérprete) con un presupuesto.
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def lanzar(args, ruta_reporte):
+    entorno = dict(os.environ,
+                   REPORTE_ARRANQUE=ruta_reporte,
+                   SALIR_TRAS_ARRANQUE='1',
+                   ARRANQUE_LANZADO=repr(time.time()),
+                   PUERTO_METRICAS='0')
+    if args.camaras:
+        entorno['CAMARAS'] = args.camaras
+    if args.base_datos:
+        entorno['BASE_DATOS'] = args.base_datos
+    subprocess.run([sys.executable, 'Deteccion-Capturas.py'], cwd=RAIZ, env=entorno, timeout=args.timeout,
+                   stdout=subprocess.DEVNULL, check=True)
+    with open(ruta_reporte, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def resumen(valores):
+    s = np.array(valores)
+    return {'media_s': float(s.mean()), 'p50_s': float(np.percentile(s, 50)), 'max_s': float(s.max())}
+
+parser = argparse.ArgumentParser(description="Tiempo de arranque en frío de la estación hasta el primer frame")
+parser.add_argument('--repeticiones', type=int, default=5, help="Arranques medidos")
+parser.add_argument('--presupuesto', type=float, default=2.0, help="Mediana máxima en segundos hasta el primer frame")
+parser.add_argument('--camaras', help="Valor de CAMARAS para la prueba (por ejemplo un video grabado)")
+parser.add_argument('--base-datos', help="Valor de BASE_DATOS para la prueba (por ejemplo sqlite:arranque.db)")
+parser.add_argument('--timeout', type=float, default=60, help="Segundos máximos por arranque")
+parser.add_argument('--salida', default='resultados-arranque', help="Carpeta donde guardar el reporte")
+args = parser.parse_args()
+
+reportes = []
+with tempfile.TemporaryDirectory() as carpeta:
+    for i in range(args.repeticiones):
+        reportes.append(lanzar(args, os.path.join(carpeta, f"arranque-{i}.json")))
+        print(f"Arranque {i + 1}: primer frame a {reportes[-1]['hitos_desde_lanzamiento']['primer_frame']:.2f} s")
+
+hitos = {}
+for clave in ('hitos', 'hitos_desde_lanzamiento'):
+    nombres = reportes[0][clave].keys()
+    hitos[clave] = {nombre: resumen([r[clave][nombre] for r in reportes]) for nombre in nombres}
+
+mediana = hitos['hitos_desde_lanzamiento']['primer_frame']['p50_s']
+reporte = {
+    'fecha': datetime.now().isoformat(timespec='seconds'),
+    'repeticiones': args.repeticiones,
+    'camaras': args.camaras,
+    'presupuesto_s': args.presupuesto,
+    'dentro_del_presupuesto': mediana <= args.presupuesto,
+    **hitos,
+}
+
+os.makedirs(args.salida, exist_ok=True)
+ruta_reporte = os.path.join(args.salida, f"arranque-{datetime.now():%Y%m%d-%H%M%S}.json")
+with open(ruta_reporte, 'w', encoding='utf-8') as f:
+    json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+print(f"{'Hito':<16}{'media':>9}{'p50':>9}{'max':>9}  (s desde el lanzamiento)")
+for nombre, datos in hitos['hitos_desde_lanzamiento'].items():
+    print(f"{nombre:<16}{datos['media_s']:>9.2f}{datos['p50_s']:>9.2f}{datos['max_s']:>9.2f}")
+print(f"Reporte guardado en {ruta_reporte}")
+
+if not reporte['dentro_del_presupuesto']:
+    print(f"FUERA DE PRESUPUESTO: mediana {mediana:.2f} s > {args.presupuesto:.2f} s")
+    sys.exit(1)
@@ -0,0 +1,63 @@
+import os
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from datos_cache import construir_shards, cargar_shards, medir_epoca
+
+# Compara el tiempo de una época del pipeline de entrada anterior (ImageDataGenerator
+# + from_generator) con el de los shards en caché, sin entrenar el modelo
+
+# Definir parámetros
+TAMANO_IMG = 224
+BATCH_SIZE = 32
+
+# Directorios de los datasets
+DIRECTORIOS = {
+    'trashnet': './dataset-original',
+    'garbage': './Garbage classification',
+    'taco': './TACO',
+}
+DIRECTORIO_CACHE = './cache-datasets'
+
+# Mismo ImageDataGenerator con aumentación que usaba training.py
+datagen = ImageDataGenerator(
+    rescale=1./255,
+    rotation_range=40,
+    width_shift_range=0.2,
+    height_shift_range=0.2,
+    shear_range=0.2,
+    zoom_range=0.2,
+    horizontal_flip=True,
+    fill_mode='nearest',
+    validation_split=0.15
+)
+
+def convertir_a_dataset(directory_iterator):
+    def generator():
+        for batch in directory_iterator:
+            yield batch[0], batch[1]
+    return tf.data.Dataset.from_generator(generator, output_signature=(
+        tf.TensorSpec(shape=(None, TAMANO_IMG, TAMANO_IMG, 3), dtype=tf.float32),
+        tf.TensorSpec(shape=(None, 6), dtype=tf.float32)))
+
+total_anterior = 0.0
+total_cache = 0.0
+for nombre, directorio in DIRECTORIOS.items():
+    iterador = datagen.flow_from_directory(
+        directorio,
+        target_size=(TAMANO_IMG, TAMANO_IMG),
+        batch_size=BATCH_SIZE,
+        class_mode='categorical',
+        subset='training'
+    )
+    tiempo_anterior, lotes = medir_epoca(convertir_a_dataset(iterador), pasos=len(iterador))
+
+    destino = os.path.join(DIRECTORIO_CACHE, nombre)
+    construir_shards(directorio, destino, 'training', TAMANO_IMG)
+    tiempo_cache, _ = medir_epoca(cargar_shards(destino, 'training', batch_size=BATCH_SIZE, aumentar=True, barajar=True))
+
+    total_anterior += tiempo_anterior
+    total_cache += tiempo_cache
+    print(f"{nombre}: {lotes} lotes | anterior {tiempo_anterior:.1f} s | caché {tiempo_cache:.1f} s")
+
+print(f"Época de entrada completa: anterior {total_anterior:.1f} s | caché {total_cache:.1f} s "
+      f"({total_anterior / total_cache:.1f}x)")
@@ -1,23 +1,39 @@
+import os
+import sys
 import tensorflow as tf
 from tensorflow.keras.preprocessing import image
 import numpy as np
 
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from backends_inferencia import CLASES_MODELO
+from servidor_lotes import ServidorLotes
+
 # Cargar el modelo guardado
 modelo = tf.keras.models.load_model('modelo_mejorado.h5')
 
-# Cargar una nueva imagen para hacer predicciones
-ruta_imagen = './prueba2.jpg'  # Cambia esto por la ruta de tu imagen
+# Cargar nuevas imágenes para hacer predicciones (se pueden pasar varias rutas como argumentos)
+rutas_imagenes = sys.argv[1:] or ['./prueba2.jpg']  # Cambia esto por la ruta de tu imagen
 TAMANO_IMG = 224  # Tamaño de imagen al que el modelo fue entrenado
 
-# Preprocesar la imagen
-img = image.load_img(ruta_imagen, target_size=(TAMANO_IMG, TAMANO_IMG))
-img_array = image.img_to_array(img) / 255.0  # Normalizar
-img_array = np.expand_dims(img_array, axis=0)  # Expandir dimensiones para hacerla compatible con el modelo
+# Servidor de micro-lotes: agrupa las imágenes en una sola llamada a predict
+MAX_LOTE = 16        # Tamaño máximo de cada lote
+MAX_ESPERA = 0.01    # Segundos que se espera a completar un lote antes de predecir
+servidor = ServidorLotes(lambda lote: modelo.predict_on_batch(lote), MAX_LOTE, MAX_ESPERA)
 
-# Hacer la predicción
-prediccion = modelo.predict(img_array)
+# Preprocesar las imágenes y enviarlas al servidor
+futuros = []
+for ruta_imagen in rutas_imagenes:
+    img = image.load_img(ruta_imagen, target_size=(TAMANO_IMG, TAMANO_IMG))
+    img_array = image.img_to_array(img) / 255.0  # Normalizar
+    futuros.append(servidor.enviar(img_array))
 
 # Mostrar el resultado
-clases = ['glass', 'paper', 'cardboard', 'plastic', 'metal', 'trash']
-clase_predicha = np.argmax(prediccion)
-print(f"El objeto es: {clases[clase_predicha]}")
\ No newline at end of file
+clases = CLASES_MODELO
+for ruta_imagen, futuro in zip(rutas_imagenes, futuros):
+    prediccion = futuro.result()
+    clase_predicha = np.argmax(prediccion)
+    print(f"{ruta_imagen}: el objeto es: {clases[clase_predicha]}")
+
+servidor.detener()
+print(servidor.resumen())
@@ -1,6 +1,11 @@
 import os
+import sys
 from dotenv import load_dotenv
-from inference_sdk import InferenceHTTPClient
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cliente_inferencia import ClienteInferencia
+from cache_inferencia import CacheInferencia
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -13,12 +18,14 @@ print(f"API Key cargada: {api_key}")  # Línea de depuración
 if api_key is None:
     raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
 
-# Configurar el cliente de inferencia con la API de Roboflow
-CLIENT = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",
-    api_key=api_key
+# Configurar el cliente de inferencia con la API de Roboflow; la caché en disco
+# hace que volver a ejecutar la prueba con la misma imagen no llame a la API
+CLIENT = ClienteInferencia(
+    api_key=api_key,
+    cache=CacheInferencia(ttl=24 * 3600, directorio=".cache_inferencia")
 )
 
 # Hacer la inferencia en una imagen de prueba
 result = CLIENT.infer("prueba.jpg", model_id="waste-detection-ctmyy/9")
-print(result)
\ No newline at end of file
+print(result)
+print(f"Caché: {CLIENT.cache.estadisticas()}")
\ No newline at end of file
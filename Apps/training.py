@@ -2,116 +2,87 @@ import os
 import numpy as np
 import tensorflow as tf
 import matplotlib.pyplot as plt
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import TensorBoard, EarlyStopping, ModelCheckpoint
 from tensorflow.keras.applications import ResNet50
-from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout
+from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout, Input
 from tensorflow.keras.models import Model
+from tensorflow.keras.optimizers import Adam
+from datos_cache import construir_shards, cargar_shards, cargar_mezcla, leer_info, firma_fuentes, pesos_clases, TiempoEpoca
+from embeddings_cache import calcular_embeddings, pesos_por_ejemplo, LotesMemmap
 
 # Definir parámetros
 TAMANO_IMG = 224  # Tamaño de las imágenes ajustado para ResNet50
 BATCH_SIZE = 32   # Tamaño del lote para entrenamiento
 EPOCHS = 50       # Número de épocas máximo de entrenamiento
 
+# 'embeddings': el backbone congelado se ejecuta una sola vez por imagen y la cabeza se entrena
+#               sobre los embeddings guardados en disco (minutos en lugar de horas en CPU)
+# 'completo': cada época ejecuta ResNet50 completo sobre las imágenes aumentadas
+MODO_ENTRENAMIENTO = 'embeddings'
+VARIANTES_AUMENTADAS = 2  # Copias aumentadas fijas de cada imagen, además de la original (modo 'embeddings')
+# Épocas finales con las últimas capas de ResNet50 descongeladas, sobre las imágenes (no los
+# embeddings). Es opcional: cada época ejecuta ResNet50 completo con retropropagación sobre
+# todo el corpus, lo que en CPU tarda horas y anula el ahorro del modo 'embeddings'. Con GPU,
+# 3-5 épocas suelen mejorar algo la precisión
+EPOCHS_AJUSTE_FINO = 0
+CAPAS_AJUSTE_FINO = 30    # Número de capas finales de ResNet50 que se descongelan en el ajuste fino
+
 # Directorios de los datasets
 DIRECTORIO_TRASHNET = './dataset-original'
 DIRECTORIO_GARBAGE = './Garbage classification'
 DIRECTORIO_TACO = './TACO'
-
-# Configurar generadores de datos con aumentación
-datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=40,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    shear_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True,
-    fill_mode='nearest',
-    validation_split=0.15  # Mantener el 15% para validación
-)
-
-# Función para convertir DirectoryIterator a tf.data.Dataset
-def convertir_a_dataset(directory_iterator):
-    def generator():
-        for batch in directory_iterator:
-            yield batch[0], batch[1]  # X (imágenes) e Y (etiquetas)
-    return tf.data.Dataset.from_generator(generator, output_signature=(
-        tf.TensorSpec(shape=(None, TAMANO_IMG, TAMANO_IMG, 3), dtype=tf.float32),
-        tf.TensorSpec(shape=(None, 6), dtype=tf.float32)))
-
-# Cargar datos de entrenamiento y validación para cada dataset
-entrenamiento_trashnet = datagen.flow_from_directory(
-    DIRECTORIO_TRASHNET,
-    target_size=(TAMANO_IMG, TAMANO_IMG),
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training'
-)
-
-validacion_trashnet = datagen.flow_from_directory(
-    DIRECTORIO_TRASHNET,
-    target_size=(TAMANO_IMG, TAMANO_IMG),
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
-
-entrenamiento_garbage = datagen.flow_from_directory(
-    DIRECTORIO_GARBAGE,
-    target_size=(TAMANO_IMG, TAMANO_IMG),
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training'
-)
-
-validacion_garbage = datagen.flow_from_directory(
-    DIRECTORIO_GARBAGE,
-    target_size=(TAMANO_IMG, TAMANO_IMG),
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
+DIRECTORIO_CACHE = './cache-datasets'  # Shards TFRecord ya decodificados y redimensionados
+
+# Peso de cada dataset al intercalarlos durante el entrenamiento (None: proporcional a su tamaño)
+PESOS_FUENTES = {'trashnet': 1.0, 'garbage': 1.0, 'taco': 1.0}
+BALANCEAR_CLASES = True  # Compensar en la pérdida las clases con menos imágenes
+
+# Construir (solo la primera vez) los shards en caché: cada imagen se decodifica y
+# redimensiona una única vez en lugar de en cada época
+fuentes = {
+    'trashnet': DIRECTORIO_TRASHNET,
+    'garbage': DIRECTORIO_GARBAGE,
+    'taco': DIRECTORIO_TACO,
+}
+for nombre, directorio in fuentes.items():
+    for subset in ('training', 'validation'):
+        construir_shards(directorio, os.path.join(DIRECTORIO_CACHE, nombre), subset, TAMANO_IMG)
+
+# Cargar datos de entrenamiento (con aumentación) y validación para cada dataset
+def cargar(nombre, subset, aumentar=None, barajar=None):
+    entrenamiento = subset == 'training'
+    return cargar_shards(os.path.join(DIRECTORIO_CACHE, nombre), subset, batch_size=BATCH_SIZE,
+                         aumentar=entrenamiento if aumentar is None else aumentar,
+                         barajar=entrenamiento if barajar is None else barajar)
+
+ds_validacion_trashnet = cargar('trashnet', 'validation')
+ds_validacion_garbage = cargar('garbage', 'validation')
+ds_validacion_taco = cargar('taco', 'validation')
+
+# Intercalar los tres datasets de entrenamiento según PESOS_FUENTES; las etiquetas ya están
+# unificadas en las 6 clases de la cabeza. Una época recorre tantos ejemplos como el corpus
+# completo, así que steps_per_epoch se conoce de antemano
+destinos = [os.path.join(DIRECTORIO_CACHE, nombre) for nombre in fuentes]
+entrenamiento_combined, pasos_por_epoca = cargar_mezcla(
+    destinos, 'training',
+    pesos=[PESOS_FUENTES[nombre] for nombre in fuentes] if PESOS_FUENTES else None,
+    batch_size=BATCH_SIZE
 )
-
-entrenamiento_taco = datagen.flow_from_directory(
-    DIRECTORIO_TACO,
-    target_size=(TAMANO_IMG, TAMANO_IMG),
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training'
-)
-
-validacion_taco = datagen.flow_from_directory(
-    DIRECTORIO_TACO,
-    target_size=(TAMANO_IMG, TAMANO_IMG),
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
-
-# Convertir cada DirectoryIterator a tf.data.Dataset
-ds_entrenamiento_trashnet = convertir_a_dataset(entrenamiento_trashnet)
-ds_validacion_trashnet = convertir_a_dataset(validacion_trashnet)
-
-ds_entrenamiento_garbage = convertir_a_dataset(entrenamiento_garbage)
-ds_validacion_garbage = convertir_a_dataset(validacion_garbage)
-
-ds_entrenamiento_taco = convertir_a_dataset(entrenamiento_taco)
-ds_validacion_taco = convertir_a_dataset(validacion_taco)
-
-# Combinar los datasets
-entrenamiento_combined = ds_entrenamiento_trashnet.concatenate(ds_entrenamiento_garbage).concatenate(ds_entrenamiento_taco)
 validacion_combined = ds_validacion_trashnet.concatenate(ds_validacion_garbage).concatenate(ds_validacion_taco)
+class_weight = pesos_clases(destinos) if BALANCEAR_CLASES else None
 
 # Usar ResNet50 preentrenado y construir el modelo
 base_model = ResNet50(weights='imagenet', include_top=False, input_shape=(TAMANO_IMG, TAMANO_IMG, 3))
 base_model.trainable = False  # Congelar las capas del modelo preentrenado
 
-x = base_model.output
-x = GlobalAveragePooling2D()(x)
-x = Dense(256, activation='relu')(x)
-x = Dropout(0.5)(x)
-predictions = Dense(6, activation='softmax')(x)
+# Capas de la cabeza: se comparten entre el modelo completo y la cabeza sola que se
+# entrena sobre los embeddings, así ambos usan los mismos pesos
+capa_densa = Dense(256, activation='relu')
+capa_dropout = Dropout(0.5)
+capa_salida = Dense(6, activation='softmax')
+
+embedding = GlobalAveragePooling2D()(base_model.output)
+predictions = capa_salida(capa_dropout(capa_densa(embedding)))
 
 modeloCNN = Model(inputs=base_model.input, outputs=predictions)
 
@@ -122,15 +93,79 @@ modeloCNN.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['a
 early_stopping = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True, mode='min')
 checkpointer = ModelCheckpoint(filepath='modelo_mejorado.h5', save_best_only=True, monitor='val_loss', mode='min')
 
-# Entrenar el modelo
-historial = modeloCNN.fit(
-    entrenamiento_combined,
-    validation_data=validacion_combined,
-    epochs=EPOCHS,
-    callbacks=[early_stopping, checkpointer],
-    steps_per_epoch=len(entrenamiento_trashnet),
-    validation_steps=len(validacion_trashnet)
-)
+tiempo_epoca = TiempoEpoca()
+
+if MODO_ENTRENAMIENTO == 'embeddings':
+    # Calcular una sola vez los embeddings del backbone congelado
+    backbone = Model(inputs=base_model.input, outputs=embedding)
+
+    def combinar(subset, aumentar):
+        nombres = list(fuentes)
+        ds = cargar(nombres[0], subset, aumentar=aumentar, barajar=False)
+        for nombre in nombres[1:]:
+            ds = ds.concatenate(cargar(nombre, subset, aumentar=aumentar, barajar=False))
+        return ds
+
+    def num_ejemplos(subset):
+        return [leer_info(os.path.join(DIRECTORIO_CACHE, nombre), subset)['num_ejemplos'] for nombre in fuentes]
+
+    emb_entrenamiento, y_entrenamiento = calcular_embeddings(
+        backbone, lambda variante: combinar('training', aumentar=variante > 0),
+        os.path.join(DIRECTORIO_CACHE, 'embeddings-training'), sum(num_ejemplos('training')),
+        variantes=1 + VARIANTES_AUMENTADAS, origen=firma_fuentes(destinos, 'training'))
+    emb_validacion, y_validacion = calcular_embeddings(
+        backbone, lambda variante: combinar('validation', aumentar=False),
+        os.path.join(DIRECTORIO_CACHE, 'embeddings-validation'), sum(num_ejemplos('validation')),
+        origen=firma_fuentes(destinos, 'validation'))
+
+    # Cada época sortea los ejemplos con la misma proporción por fuente que cargar_mezcla
+    probabilidades = pesos_por_ejemplo(num_ejemplos('training'),
+                                       [PESOS_FUENTES[nombre] for nombre in fuentes] if PESOS_FUENTES else None,
+                                       variantes=1 + VARIANTES_AUMENTADAS)
+
+    # Entrenar solo la cabeza sobre los embeddings
+    entrada_embedding = Input(shape=(backbone.output_shape[-1],))
+    cabeza = Model(inputs=entrada_embedding, outputs=capa_salida(capa_dropout(capa_densa(entrada_embedding))))
+    cabeza.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+
+    historial = cabeza.fit(
+        LotesMemmap(emb_entrenamiento, y_entrenamiento, batch_size=BATCH_SIZE, barajar=True,
+                    probabilidades=probabilidades),
+        validation_data=LotesMemmap(emb_validacion, y_validacion, batch_size=BATCH_SIZE),
+        epochs=EPOCHS,
+        callbacks=[early_stopping, tiempo_epoca],
+        class_weight=class_weight
+    )
+    modeloCNN.save('modelo_mejorado.h5')
+else:
+    # Entrenar el modelo
+    historial = modeloCNN.fit(
+        entrenamiento_combined,
+        validation_data=validacion_combined,
+        epochs=EPOCHS,
+        steps_per_epoch=pasos_por_epoca,
+        callbacks=[early_stopping, checkpointer, tiempo_epoca],
+        class_weight=class_weight
+    )
+print(f"Tiempo medio por época: {sum(tiempo_epoca.tiempos) / len(tiempo_epoca.tiempos):.1f} s")
+
+# Ajuste fino: descongelar las últimas capas de ResNet50 (sin las de BatchNormalization)
+# y entrenar el modelo completo con una tasa de aprendizaje baja
+if EPOCHS_AJUSTE_FINO > 0:
+    base_model.trainable = True
+    for capa in base_model.layers[:-CAPAS_AJUSTE_FINO]:
+        capa.trainable = False
+    for capa in base_model.layers[-CAPAS_AJUSTE_FINO:]:
+        capa.trainable = not isinstance(capa, tf.keras.layers.BatchNormalization)
+    modeloCNN.compile(optimizer=Adam(learning_rate=1e-5), loss='categorical_crossentropy', metrics=['accuracy'])
+    modeloCNN.fit(
+        entrenamiento_combined,
+        validation_data=validacion_combined,
+        epochs=EPOCHS_AJUSTE_FINO,
+        steps_per_epoch=pasos_por_epoca,
+        callbacks=[checkpointer, TiempoEpoca()],
+        class_weight=class_weight
+    )
 
 # Evaluar el modelo
 resultado = modeloCNN.evaluate(validacion_combined)
@@ -1,7 +1,11 @@
 import os
 import cv2
+import sys
 from dotenv import load_dotenv  # Importar dotenv para cargar las variables de entorno
-from inference_sdk import InferenceHTTPClient
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cliente_inferencia import ClienteInferencia
 #CLASIFICADOR DE BASURA
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -14,14 +18,14 @@ if api_key is None:
     raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
 
 # Inicializar el cliente de inferencia con Roboflow
-CLIENT = InferenceHTTPClient(
+CLIENT = ClienteInferencia(
     api_url="https://classify.roboflow.com",
     api_key=api_key
 )
 
-def infer_image_from_roboflow(image_path):
-    """Función para hacer la inferencia con la API de Roboflow en una imagen"""
-    result = CLIENT.infer(image_path, model_id="recyclingman/3")
+def infer_image_from_roboflow(frame):
+    """Función para hacer la inferencia con la API de Roboflow en un frame en memoria"""
+    result = CLIENT.infer(frame, model_id="recyclingman/3")
     return result
 
 def draw_classification(frame, predictions):
@@ -56,12 +60,8 @@ while True:
         print("Error al capturar el frame.")
         break
 
-    # Guardar el frame como imagen temporal
-    image_path = "temp_frame.jpg"
-    cv2.imwrite(image_path, frame)
-
-    # Hacer la inferencia con la API de Roboflow
-    result = infer_image_from_roboflow(image_path)
+    # Hacer la inferencia con la API de Roboflow directamente sobre el frame en memoria
+    result = infer_image_from_roboflow(frame)
 
     # Imprimir el resultado para verificar la estructura
     print("Resultado devuelto por Roboflow:")
@@ -1,7 +1,12 @@
 import os
 import cv2
+import sys
 from dotenv import load_dotenv  # Importar dotenv para cargar las variables de entorno
-from inference_sdk import InferenceHTTPClient
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cliente_inferencia import ClienteInferencia
+from inferencia_tiempo_real import InferenciaUltimoFrame, MedidorFPS, dibujar_metricas
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -13,16 +18,19 @@ api_key = os.getenv("PRIVATE_API_KEY")
 if api_key is None:
     raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
 
+# True: la cámara y la ventana van a la velocidad de la cámara y la inferencia toma siempre el frame más reciente
+# False: cada frame espera a su inferencia (modo síncrono original)
+MODO_ULTIMO_FRAME = True
+
 # Inicializar el cliente de inferencia con Roboflow
-CLIENT = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",  # URL para detección
+CLIENT = ClienteInferencia(
     api_key=api_key
 )
 
-def infer_image_from_roboflow(image_path):
-    """Función para hacer la inferencia con la API de Roboflow en una imagen"""
+def infer_image_from_roboflow(frame):
+    """Función para hacer la inferencia con la API de Roboflow en un frame en memoria"""
     # Cambia el model_id para el modelo de detección que mencionaste
-    result = CLIENT.infer(image_path, model_id="garbage-classification-3/2")
+    result = CLIENT.infer(frame, model_id="garbage-classification-3/2")
     return result
 
 def draw_detections(frame, predictions):
@@ -56,29 +64,41 @@ if not cap.isOpened():
     print("No se pudo abrir la cámara.")
     exit()
 
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Evita acumular frames atrasados en el búfer del driver
+
 print("Presiona 'q' para salir.")
 
+motor = InferenciaUltimoFrame(infer_image_from_roboflow) if MODO_ULTIMO_FRAME else None
+fps_vista = MedidorFPS()
+
 while True:
     ret, frame = cap.read()  # Leer un frame de la cámara
     if not ret:
         print("Error al capturar el frame.")
         break
 
-    # Guardar el frame como imagen temporal
-    image_path = "temp_frame.jpg"
-    cv2.imwrite(image_path, frame)
-
-    # Hacer la inferencia con la API de Roboflow
-    result = infer_image_from_roboflow(image_path)
+    if motor:
+        # Proponer el frame actual y usar la última detección disponible
+        motor.enviar(frame)
+        result, nuevo = motor.ultimo_resultado()
+    else:
+        # Hacer la inferencia con la API de Roboflow directamente sobre el frame en memoria
+        result = infer_image_from_roboflow(frame)
+        nuevo = True
 
     # Imprimir el resultado para verificar la estructura
-    print("Resultado devuelto por Roboflow:")
-    print(result)
+    if nuevo:
+        print("Resultado devuelto por Roboflow:")
+        print(result)
 
     # Dibujar las detecciones en el frame si hay predicciones
     if result and 'predictions' in result and isinstance(result['predictions'], list):
         draw_detections(frame, result['predictions'])
 
+    fps_vista.tick()
+    if motor:
+        dibujar_metricas(frame, fps_vista.fps(), motor.metricas())
+
     # Mostrar el frame en una ventana de OpenCV
     cv2.imshow('Captura de residuos en tiempo real', frame)
 
@@ -86,6 +106,9 @@ while True:
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
-# Liberar la cámara y cerrar las ventanas de OpenCV
+# Detener el hilo de inferencia, liberar la cámara y cerrar las ventanas de OpenCV
+if motor:
+    motor.detener()
+    print(f"Frames descartados: {motor.frames_descartados} de {motor.frames_enviados}")
 cap.release()
 cv2.destroyAllWindows()
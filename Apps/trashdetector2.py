@@ -1,10 +1,15 @@
 import os
+import sys
 import cv2
 import tkinter as tk
 from dotenv import load_dotenv  # Importar dotenv para cargar las variables de entorno
 from tkinter import Label
 from PIL import Image, ImageTk
-from inference_sdk import InferenceHTTPClient
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cliente_inferencia import ClienteInferencia
+from deteccion_cambios import DetectorCambios
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -17,14 +22,13 @@ if api_key is None:
     raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
 
 # Inicializar el cliente de inferencia con Roboflow
-CLIENT = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",
+CLIENT = ClienteInferencia(
     api_key=api_key
 )
 
-def infer_image_from_roboflow(image_path):
-    """Función para hacer la inferencia con la API de Roboflow en una imagen"""
-    result = CLIENT.infer(image_path, model_id="10k/1")
+def infer_image_from_roboflow(frame):
+    """Función para hacer la inferencia con la API de Roboflow en un frame en memoria"""
+    result = CLIENT.infer(frame, model_id="10k/1")
     return result
 
 def map_class_name(class_name):
@@ -70,6 +74,11 @@ class WasteSortingGUI:
         self.organic_count = 0
         self.plastic_count = 0
         self.glass_count = 0
+
+        # Solo se envían a Roboflow los frames que cambiaron respecto al último inferido;
+        # mientras la escena no cambia se reutiliza la última detección
+        self.detector_cambios = DetectorCambios()
+        self.last_result = None
         
         # Frame para la visualización de la cámara
         self.camera_frame = Label(self.window)
@@ -88,24 +97,33 @@ class WasteSortingGUI:
         self.glass_label = Label(self.window, text=f"Cristales: {self.glass_count}", font=("Arial", 12))
         self.glass_label.pack()
 
+        self.skipped_label = Label(self.window, text="Frames sin cambios omitidos: 0", font=("Arial", 10))
+        self.skipped_label.pack()
+
         self.update_frame()  # Llamada inicial para empezar a mostrar la cámara
 
     def update_frame(self):
         """Función para capturar frames de la cámara y mostrar las detecciones en tiempo real"""
         ret, frame = self.cap.read()
         if ret:
-            # Guardar el frame temporalmente para enviar a Roboflow
-            image_path = "temp_frame.jpg"
-            cv2.imwrite(image_path, frame)
-
-            # Hacer la inferencia con Roboflow
-            result = infer_image_from_roboflow(image_path)
+            if self.detector_cambios.debe_inferir(frame):
+                # Hacer la inferencia con Roboflow directamente sobre el frame en memoria
+                result = infer_image_from_roboflow(frame)
+                if result is None:
+                    # La inferencia falló: olvidar la referencia para reintentar aunque la escena no cambie
+                    self.detector_cambios.reiniciar()
+                self.last_result = result
+                new_result = True
+            else:
+                # La escena no cambió: reutilizar la última detección sin llamar a la API
+                result = self.last_result
+                new_result = False
 
             # Dibujar las detecciones en el frame
             if result and 'predictions' in result and isinstance(result['predictions'], list):
                 draw_detections(frame, result['predictions'])
-                # Actualizar estadísticas según el tipo de residuo detectado
-                for pred in result['predictions']:
+                # Actualizar estadísticas según el tipo de residuo detectado (solo con detecciones nuevas)
+                for pred in (result['predictions'] if new_result else []):
                     class_name = map_class_name(pred['class'])
                     if class_name == 'plástico':
                         self.plastic_count += 1
@@ -120,6 +138,8 @@ class WasteSortingGUI:
             self.organic_label.config(text=f"Residuos Orgánicos: {self.organic_count}")
             self.plastic_label.config(text=f"Plásticos: {self.plastic_count}")
             self.glass_label.config(text=f"Cristales: {self.glass_count}")
+            self.skipped_label.config(text=f"Frames sin cambios omitidos: {self.detector_cambios.frames_omitidos}"
+                                           f" (enviados: {self.detector_cambios.frames_enviados})")
 
             # Convertir el frame de OpenCV a un formato compatible con Tkinter
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -1,8 +1,13 @@
 import os
+import sys
 import cv2 
 import numpy as np 
 from dotenv import load_dotenv 
-from inference_sdk import InferenceHTTPClient 
+
+# Permitir importar los módulos compartidos de la raíz del repositorio
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cliente_inferencia import ClienteInferencia
+from inferencia_tiempo_real import InferenciaUltimoFrame, MedidorFPS, dibujar_metricas
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -12,19 +17,19 @@ api_key = os.getenv("PRIVATE_API_KEY")
 if api_key is None:
     raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
 
+# True: la cámara y la ventana van a la velocidad de la cámara y la inferencia toma siempre el frame más reciente
+# False: cada frame espera a su inferencia (modo síncrono original)
+MODO_ULTIMO_FRAME = True
+
 # Configurar el cliente de inferencia con la API de Roboflow
-CLIENT = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",
+CLIENT = ClienteInferencia(
     api_key=api_key
 )
 
 # Función para hacer la inferencia en un frame de la cámara
 def infer_frame(frame):
-    # Guardar temporalmente el frame como imagen
-    cv2.imwrite("temp_frame.jpg", frame)
-    
-    # Hacer la inferencia en la imagen temporal
-    result = CLIENT.infer("temp_frame.jpg", model_id="waste-detection-ctmyy/9")
+    # Hacer la inferencia sobre el frame en memoria (se codifica a JPEG una sola vez)
+    result = CLIENT.infer(frame, model_id="waste-detection-ctmyy/9")
     
     return result
 
@@ -50,6 +55,7 @@ def draw_detections(frame, detections):
 cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # Fuerza el uso de DirectShow en lugar de MSMF
 cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
 cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Evita acumular frames atrasados en el búfer del driver
 #cap.set(cv2.CAP_PROP_BRIGHTNESS, 0.5)  # Ajusta el brillo
 #cap.set(cv2.CAP_PROP_EXPOSURE, 0.1)  # Ajusta la exposición
 if not cap.isOpened():
@@ -58,6 +64,9 @@ if not cap.isOpened():
 
 print("Presiona 'q' para cerrar la cámara.")
 
+motor = InferenciaUltimoFrame(infer_frame) if MODO_ULTIMO_FRAME else None
+fps_vista = MedidorFPS()
+
 while True:
     # Leer un frame de la cámara
     ret, frame = cap.read()
@@ -66,12 +75,24 @@ while True:
         print("No se pudo capturar el frame.")
         break
 
-    # Hacer la inferencia en el frame actual
-    result = infer_frame(frame)
-    print(result)
+    if motor:
+        # Proponer el frame actual y usar la última detección disponible
+        motor.enviar(frame)
+        result, nuevo = motor.ultimo_resultado()
+        if nuevo:
+            print(result)
+    else:
+        # Hacer la inferencia en el frame actual
+        result = infer_frame(frame)
+        print(result)
 
     # Dibujar las detecciones en el frame
-    draw_detections(frame, result['predictions'])
+    if result and 'predictions' in result:
+        draw_detections(frame, result['predictions'])
+
+    fps_vista.tick()
+    if motor:
+        dibujar_metricas(frame, fps_vista.fps(), motor.metricas())
 
     # Mostrar el frame con las detecciones
     cv2.imshow('Detección de basura en tiempo real', frame)
@@ -80,6 +101,9 @@ while True:
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
-# Liberar la cámara y cerrar las ventanas
+# Detener el hilo de inferencia, liberar la cámara y cerrar las ventanas
+if motor:
+    motor.detener()
+    print(f"Frames descartados: {motor.frames_descartados} de {motor.frames_enviados}")
 cap.release()
 cv2.destroyAllWindows()
\ No newline at end of file
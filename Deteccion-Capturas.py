@@ -1,52 +1,108 @@
+import time
+# Referencia para medir el arranque, tomada antes de las importaciones pesadas
+INICIO_ARRANQUE = time.perf_counter()
 import os
+import json
+import platform
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import tkinter as tk
 from tkinter import Label, Button, Toplevel, Frame, PhotoImage
 from PIL import Image, ImageTk
-import requests
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkinter import filedialog
+from tkinter import filedialog, messagebox
 from dotenv import load_dotenv
-import pyodbc
-from datetime import datetime
+from backends_inferencia import crear_backend, registrar_metricas
+from cache_inferencia import CacheInferencia
+import procesamiento
+from inferencia_tiempo_real import MedidorFPS
+from vista_previa import VistaPrevia, cargar_icono
+from vista_historico import VistaHistorico
+from captura_camaras import camaras_desde_configuracion
+from persistencia import EscritorPorLotes, SQL_INSERTAR_EVENTO, SQL_TOTALES_ESTACION, actualizar_resumenes
+from motor_clasificacion import MotorClasificacion
+from base_datos import abrir_base_datos
+from metricas import METRICAS, PUERTO_METRICAS as PUERTO_METRICAS_DEFECTO, TiemposArranque, iniciar_servidor_metricas, iniciar_registro_rodante
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
 
+# Backend de inferencia: 'remoto' (API de Roboflow) o 'local' (modelo_mejorado.h5 en este equipo)
+BACKEND_INFERENCIA = os.getenv("BACKEND_INFERENCIA", "remoto")
+
 # Obtener la API Key desde el archivo .env
 api_key = os.getenv("PRIVATE_API_KEY")
 
-if api_key is None:
+if api_key is None and BACKEND_INFERENCIA == "remoto":
     raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
 
-# URL del modelo en Roboflow
-api_url = "https://detect.roboflow.com/10k/1"
-
-# Diccionario para contar los tipos de residuos
-residuo_contador = {'plástico': 0, 'vidrio': 0, 'metal': 0, 'papel': 0, 'otros': 0}
-
-# Conexión a SQL Server
-conn = pyodbc.connect('DRIVER={ODBC Driver 17 for SQL Server};'
-                      'SERVER=localhost;'
-                      'DATABASE=WasteSortingDB;'
-                      'Trusted_Connection=yes;')
-cursor = conn.cursor()
-
-# Crear tabla en SQL Server si no existe
-cursor.execute('''
-IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='waste_stats' AND xtype='U')
-CREATE TABLE waste_stats (
-    id INT PRIMARY KEY IDENTITY(1,1),
-    plastic_count INT,
-    glass_count INT,
-    metal_count INT,
-    paper_count INT,
-    others_count INT,
-    timestamp DATETIME DEFAULT GETDATE()
-)
-''')
-conn.commit()
+# URL y modelo de Roboflow
+api_url = None  # La de ROBOFLOW_API_URL o, sin ella, la API de detección de Roboflow
+model_id = "10k/1"
+
+# Número de capturas que se envían en cada solicitud
+NUM_CAPTURAS = 3
+
+# Cámaras o videos de la estación, separados por comas (por ejemplo CAMARAS=0,1 o CAMARAS=prueba.mp4).
+# Cada una se lee en su propio hilo; la vista previa y las solicitudes usan la cámara seleccionada
+CAMARAS = os.getenv("CAMARAS", "2")
+
+# Identificador de la estación con el que se guardan las detecciones. La interfaz y servicio.py
+# no deben correr a la vez en la misma estación: cada uno carga su motor y abre las cámaras
+ESTACION = os.getenv("ESTACION", platform.node() or "estacion")
+
+# Base de datos: vacía para el SQL Server local, una cadena de conexión ODBC, o 'sqlite:<ruta>'
+# para una base SQLite local (pruebas o estaciones sin SQL Server)
+BASE_DATOS = os.getenv("BASE_DATOS")
+
+# Métricas en http://127.0.0.1:<PUERTO_METRICAS>/metrics (0 para desactivar) y, opcionalmente,
+# una instantánea periódica en un log rotativo
+PUERTO_METRICAS = int(os.getenv("PUERTO_METRICAS", str(PUERTO_METRICAS_DEFECTO)))
+REGISTRO_METRICAS = os.getenv("REGISTRO_METRICAS")
+
+# Tiempo máximo en segundos hasta mostrar el primer frame. El reporte de arranque se imprime al
+# mostrarlo y, si se define REPORTE_ARRANQUE, se guarda en ese archivo JSON. Apps/medir-arranque.py
+# lanza la estación varias veces con SALIR_TRAS_ARRANQUE=1 para medirlo en frío
+PRESUPUESTO_ARRANQUE = float(os.getenv("PRESUPUESTO_ARRANQUE", "2.0"))
+REPORTE_ARRANQUE = os.getenv("REPORTE_ARRANQUE")
+SALIR_TRAS_ARRANQUE = os.getenv("SALIR_TRAS_ARRANQUE") == "1"
+lanzado = os.getenv("ARRANQUE_LANZADO")
+arranque = TiemposArranque(INICIO_ARRANQUE, float(lanzado) if lanzado else None)
+arranque.marcar('importaciones')
+
+def crear_backend_inferencia():
+    # Backend compartido. En modo remoto el cliente HTTP reutiliza las conexiones entre
+    # solicitudes y responde desde la caché las imágenes idénticas que ya se enviaron;
+    # en modo local el modelo se carga en segundo plano
+    backend = crear_backend(BACKEND_INFERENCIA, api_url, api_key, model_id,
+                            max_en_vuelo=NUM_CAPTURAS,
+                            cache=CacheInferencia(max_entradas=256, ttl=600))
+    registrar_metricas(backend, METRICAS)
+    return backend
+
+# El backend (y con él requests o TensorFlow) se crea en segundo plano mientras se abre la ventana;
+# la primera inferencia espera a que esté listo
+arranque_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arranque")
+backend_inferencia = arranque_executor.submit(crear_backend_inferencia)
+arranque_executor.shutdown(wait=False)
+
+# La base de datos no se toca aquí: la conexión y la creación de tablas ocurren en segundo plano
+# al abrir la ventana, y las consultas corren en un grupo de hilos. Sus callbacks llegan por
+# esta cola y se ejecutan en el hilo de Tk
+db_callbacks = queue.Queue()
+base_datos = abrir_base_datos(BASE_DATOS, despachar=db_callbacks.put)
+
+# Las detecciones se guardan desde un hilo de fondo, en lotes y con su propia conexión;
+# si la base de datos no responde se conservan en memoria hasta que vuelva
+escritor_estadisticas = EscritorPorLotes(base_datos.conectar_cuando_lista, SQL_INSERTAR_EVENTO,
+                                         al_insertar=actualizar_resumenes)
+for campo in ('pendientes', 'registros_escritos', 'registros_descartados', 'registros_rechazados', 'lotes_escritos', 'errores'):
+    METRICAS.registrar_medidor(f'residuos_bd_{campo}', lambda campo=campo: escritor_estadisticas.metricas()[campo])
+
+# La inferencia, el conteo por clase y el guardado de las detecciones no dependen de Tk;
+# servicio.py usa el mismo motor sin interfaz
+motor = MotorClasificacion(backend_inferencia, escritor_estadisticas, ESTACION, max_en_vuelo=NUM_CAPTURAS)
 
 class WasteSortingGUI:
     def __init__(self, window):
@@ -61,9 +117,8 @@ class WasteSortingGUI:
         header_frame = Frame(self.window, bg='#a0e75a', height=80)
         header_frame.pack(fill="x")
 
-        img = Image.open("recycle_icon.png")
-        img_resized = img.resize((50, 50), Image.LANCZOS)
-        logo = ImageTk.PhotoImage(img_resized)
+        # El icono original pesa casi 900 KB; se usa la copia reducida que queda en caché
+        logo = ImageTk.PhotoImage(cargar_icono("recycle_icon.png", (50, 50)))
 
         logo_label = Label(header_frame, image=logo, bg='#a0e75a')
         logo_label.image = logo
@@ -93,169 +148,183 @@ class WasteSortingGUI:
                                      font=("Arial", 16, "bold"), bg="#b3f35a", fg="black", padx=20, pady=10, bd=0, relief="flat")
         self.history_button.pack(pady=5)
 
-        self.cap = cv2.VideoCapture(2, cv2.CAP_DSHOW)
+        self.cameras = camaras_desde_configuracion(CAMARAS)
+        self.active_camera = 0
+        self.last_frame_number = 0
+        buttons = [self.send_button, self.stats_button, self.history_button]
+        if len(self.cameras) > 1:
+            self.camera_button = Button(self.main_frame, text=self.camera_button_text(), command=self.next_camera,
+                                        font=("Arial", 16, "bold"), bg="#b3f35a", fg="black", padx=20, pady=10, bd=0, relief="flat")
+            self.camera_button.pack(pady=5)
+            buttons.append(self.camera_button)
+        self.buttons = tuple(buttons)
+
+        # La vista previa se reduce al espacio que dejan libre los botones y reutiliza sus buffers
+        self.preview = VistaPrevia(self.camera_frame)
+        self.main_frame.bind("<Configure>", self.on_main_frame_resize)
+
+        for camera in self.cameras:
+            for campo in ('fps_captura', 'frames_leidos', 'errores', 'reaperturas'):
+                METRICAS.registrar_medidor(f'residuos_camara_{campo}', lambda camera=camera, campo=campo: camera.metricas()[campo],
+                                           camara=camera.nombre)
+
+        # El motor envía en paralelo las inferencias de una solicitud y los resultados
+        # vuelven al hilo de Tk a través de una cola
+        self.result_queue = queue.Queue()
+        self.request_in_progress = False
+
+        self.fps_vista = MedidorFPS()
+        METRICAS.registrar_medidor('residuos_fps_vista', self.fps_vista.fps)
+        METRICAS.registrar_medidor('residuos_cola_profundidad', self.result_queue.qsize, cola='resultados')
+
+        # La ventana de estadísticas (y matplotlib) se crean la primera vez que se abren
+        self.stats_view = None
+        self.history_view = None
+        self.startup_reported = False
+
+        # Los contadores parten de los totales guardados de esta estación, no de cero en cada
+        # arranque; se suman cuando la base de datos responde, sin demorar la vista previa
+        # El histórico de waste_stats lo generó esta interfaz, así que se migra a nombre de esta estación
+        base_datos.iniciar(consulta_inicial=(SQL_TOTALES_ESTACION, [ESTACION]), al_listo=self.load_totals,
+                           estacion_legado=ESTACION)
 
         self.window_closed = False
         self.update_frame()
 
+    def on_main_frame_resize(self, event):
+        buttons_height = sum(button.winfo_reqheight() + 10 for button in self.buttons)
+        self.preview.ajustar_limite(event.width, event.height - buttons_height - 20)
+
+    def camera_button_text(self):
+        return f"CÁMARA: {self.cameras[self.active_camera].nombre}"
+
+    def next_camera(self):
+        self.active_camera = (self.active_camera + 1) % len(self.cameras)
+        self.last_frame_number = 0
+        self.camera_button.config(text=self.camera_button_text())
+
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if ret:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            imgtk = ImageTk.PhotoImage(image=img)
-            self.camera_frame.imgtk = imgtk
-            self.camera_frame.configure(image=imgtk)
+        started = time.perf_counter()
+        camera = self.cameras[self.active_camera]
+        # El hilo de la cámara llena el buffer; aquí solo se toma el último frame sin esperar
+        latest = camera.ultimo()
+        if latest is not None and latest[0] != self.last_frame_number:
+            self.last_frame_number, _, frame = latest
+            with METRICAS.cronometro('residuos_etapa_segundos', etapa='vista'):
+                self.preview.mostrar(frame)
+            self.fps_vista.tick()
+            if not self.startup_reported:
+                self.report_startup()
+
+        self.process_results()
+        self.process_db_callbacks()
 
         if not self.window_closed:
-            self.window.after(30, self.update_frame)
+            # La vista se refresca al ritmo de la cámara, descontando lo que ya tardó este ciclo
+            delay = camera.intervalo_entrega() - (time.perf_counter() - started)
+            self.window.after(max(1, int(delay * 1000)), self.update_frame)
+
+    def report_startup(self):
+        self.startup_reported = True
+        arranque.marcar('primer_frame')
+        arranque.publicar()
+        report = arranque.reporte(PRESUPUESTO_ARRANQUE)
+        print("Arranque: " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in report['hitos'].items()))
+        if not report['dentro_del_presupuesto']:
+            print(f"El primer frame tardó más que el presupuesto de arranque ({PRESUPUESTO_ARRANQUE:.2f} s).")
+        if REPORTE_ARRANQUE:
+            with open(REPORTE_ARRANQUE, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        if SALIR_TRAS_ARRANQUE:
+            self.window.after_idle(self.on_closing)
+
+    def process_db_callbacks(self):
+        while True:
+            try:
+                callback = db_callbacks.get_nowait()
+            except queue.Empty:
+                return
+            callback()
+
+    def load_totals(self, rows):
+        motor.sumar_totales(rows)
+        if self.stats_view is not None and self.stats_view.visible():
+            self.stats_view.actualizar()
 
     def send_request(self):
+        if self.request_in_progress:
+            return
+        self.request_in_progress = True
+        self.request_started = time.perf_counter()
+        METRICAS.incrementar('residuos_solicitudes_total')
+        self.send_button.config(state="disabled", text="PROCESANDO...")
+
+        # La captura y la inferencia corren fuera del hilo de Tk para no congelar la vista previa
+        threading.Thread(target=self.capture_and_infer, args=(self.cameras[self.active_camera], NUM_CAPTURAS), daemon=True).start()
+
+    def capture_and_infer(self, camera, num_captures):
+        # Se ejecuta en un hilo de fondo; el motor cuenta y guarda las detecciones. Siempre se
+        # deja algo en la cola (los resultados o el error) para que el botón vuelva a habilitarse
+        try:
+            results = motor.capturar_y_clasificar(camera, num_captures)
+        except Exception as e:
+            print(f"Error al capturar o clasificar: {e}")
+            METRICAS.incrementar('residuos_errores_total', tipo='solicitud')
+            results = e
+        self.result_queue.put(results)
+
+    def process_results(self):
+        # Se ejecuta en el hilo de Tk: los widgets e imágenes de Tk solo se crean aquí
+        try:
+            results = self.result_queue.get_nowait()
+        except queue.Empty:
+            return
+
+        if isinstance(results, Exception):
+            self.finish_request()
+            messagebox.showerror("Error", f"No se pudo procesar la solicitud: {results}")
+            return
+
         self.captures = []
         self.predictions = []
         self.capture_images = []
 
-        for i in range(3):
-            ret, frame = self.cap.read()
-            if ret:
-                result = self.infer_image_from_roboflow(frame)
-                if result and 'predictions' in result and isinstance(result['predictions'], list):
-                    pred_classes = []
-                    for pred in result['predictions']:
-                        mapped_class = self.map_class_name(pred['class'])
-                        pred_classes.append(f"{mapped_class} ({pred['confidence'] * 100:.1f}%)")
-                        residuo_contador[mapped_class] += 1
-                    self.predictions.append(", ".join(pred_classes))
-                    frame = self.draw_boxes_on_frame(frame, result['predictions'])
-                else:
-                    self.predictions.append("No se detectaron objetos.")
-                    residuo_contador['otros'] += 1
-
-                frame_resized = cv2.resize(frame, (200, 150))
-                frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(frame_rgb)
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.captures.append(imgtk)
-                self.capture_images.append(img)
-
-        self.save_to_database()
+        for frame, detections in results:
+            if detections:
+                self.predictions.append(", ".join(f"{det['class']} ({det['confidence'] * 100:.1f}%)" for det in detections))
+                frame = self.draw_boxes_on_frame(frame, detections)
+            else:
+                self.predictions.append("No se detectaron objetos.")
+
+            frame_resized = cv2.resize(frame, (200, 150))
+            frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
+            img = Image.fromarray(frame_rgb)
+            imgtk = ImageTk.PhotoImage(image=img)
+            self.captures.append(imgtk)
+            self.capture_images.append(img)
+
+        if self.stats_view is not None and self.stats_view.visible():
+            self.stats_view.actualizar()
         self.show_results_window()
+        self.finish_request()
 
-    def save_to_database(self):
-        cursor.execute('''
-            INSERT INTO waste_stats (plastic_count, glass_count, metal_count, paper_count, others_count)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            residuo_contador['plástico'],
-            residuo_contador['vidrio'],
-            residuo_contador['metal'],
-            residuo_contador['papel'],
-            residuo_contador['otros']
-        ))
-        conn.commit()
-
-    def infer_image_from_roboflow(self, image):
-        _, img_encoded = cv2.imencode('.jpg', image)
-        img_bytes = img_encoded.tobytes()
-        files = {'file': ('image.jpg', img_bytes, 'image/jpeg')}
-        response = requests.post(f"{api_url}?api_key={api_key}", files=files)
-        return response.json() if response.status_code == 200 else None
-
-    def map_class_name(self, class_name):
-        class_mapping = {'bottle': 'plástico', 'can': 'metal', 'glass': 'vidrio', 'paper': 'papel'}
-        return class_mapping.get(class_name, 'otros')
+    def finish_request(self):
+        METRICAS.observar('residuos_etapa_segundos', time.perf_counter() - self.request_started, etapa='solicitud')
+        self.request_in_progress = False
+        self.send_button.config(state="normal", text="ENVIAR SOLICITUD")
 
     def draw_boxes_on_frame(self, frame, predictions):
-        for pred in predictions:
-            if 'x' in pred and 'y' in pred and 'width' in pred and 'height' in pred:
-                x = int(pred['x'] - pred['width'] / 2)
-                y = int(pred['y'] - pred['height'] / 2)
-                width = int(pred['width'])
-                height = int(pred['height'])
-                cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 255, 0), 2)
-        return frame
+        return procesamiento.draw_boxes_on_frame(frame, predictions)
 
     def show_history(self):
         self.window.withdraw()
-        self.show_history_window()
-
-    def show_history_window(self):
-        history_window = Toplevel(self.window)
-        history_window.title("Histórico")
-        history_window.geometry("900x650")
-        history_window.configure(bg='#ffffff')
-
-        header_frame = Frame(history_window, bg='#a0e75a', height=80)
-        header_frame.pack(fill="x")
-        title_label = Label(header_frame, text="HISTORICO", font=("Arial", 20, "bold"), bg='#a0e75a', fg="black")
-        title_label.pack(pady=10)
-
-        from_label = Label(history_window, text="Desde", font=("Arial", 14), bg='#ffffff', fg="black")
-        from_label.pack(pady=5)
-        from_entry = tk.Entry(history_window, font=("Arial", 14), width=10)
-        from_entry.insert(0, "DD/MM/YYYY")
-        from_entry.pack(pady=5)
-
-        to_label = Label(history_window, text="Hasta", font=("Arial", 14), bg='#ffffff', fg="black")
-        to_label.pack(pady=5)
-        to_entry = tk.Entry(history_window, font=("Arial", 14), width=10)
-        to_entry.insert(0, "DD/MM/YYYY")
-        to_entry.pack(pady=5)
-
-        search_button = Button(history_window, text="Buscar", font=("Arial", 12), bg="#b3f35a", fg="black", command=lambda: self.search_history(from_entry.get(), to_entry.get(), history_window))
-        search_button.pack(pady=10)
-
-        self.table_frame = Frame(history_window, bg='#ffffff')
-        self.table_frame.pack(pady=20)
-
-        Button(history_window, text="REGRESAR", font=("Arial", 12), bg="#b3f35a", fg="black", bd=0, command=lambda: self.back_to_main(history_window)).pack(pady=20)
+        self.history_view = VistaHistorico(self.window, base_datos, self.back_to_main)
 
-    def back_to_main(self, history_window):
-        history_window.destroy()
+    def back_to_main(self):
+        self.history_view.destruir()
+        self.history_view = None
         self.window.deiconify()
 
-    def search_history(self, from_date, to_date, history_window):
-        for widget in self.table_frame.winfo_children():
-            widget.destroy()
-
-        try:
-            from_date_obj = datetime.strptime(from_date, "%d/%m/%Y")
-            to_date_obj = datetime.strptime(to_date, "%d/%m/%Y")
-        except ValueError:
-            print("Formato de fecha incorrecto. Usa DD/MM/YYYY.")
-            return
-
-        if from_date_obj == to_date_obj:
-            query = '''
-                SELECT plastic_count, glass_count, paper_count, metal_count, others_count, timestamp 
-                FROM waste_stats
-                WHERE CONVERT(date, timestamp) = ?
-                ORDER BY timestamp
-            '''
-            cursor.execute(query, from_date_obj)
-        else:
-            query = '''
-                SELECT plastic_count, glass_count, paper_count, metal_count, others_count, timestamp 
-                FROM waste_stats
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp
-            '''
-            cursor.execute(query, from_date_obj, to_date_obj)
-
-        rows = cursor.fetchall()
-
-        headers = ['Plástico', 'Vidrio', 'Papel', 'Metal', 'Otros', 'Fecha']
-        for col, header in enumerate(headers):
-            header_label = Label(self.table_frame, text=header, font=("Arial", 14, "bold"), bg='#ffffff', fg="black", relief="solid", bd=1, width=15)
-            header_label.grid(row=0, column=col)
-
-        for row_num, row in enumerate(rows, start=1):
-            for col_num, value in enumerate(row[:-1]):
-                cell_label = Label(self.table_frame, text=value, font=("Arial", 12), bg='#ffffff', fg="black", relief="solid", bd=1, width=20)
-                cell_label.grid(row=row_num, column=col_num)
-            date_label = Label(self.table_frame, text=row[-1].strftime('%Y-%m-%d %H:%M'), font=("Arial", 12), bg='#ffffff', fg="black", relief="solid", bd=1, width=20)
-            date_label.grid(row=row_num, column=5)
-
     def show_results_window(self):
         results_window = Toplevel(self.window)
         results_window.title("Resultados de Clasificación")
@@ -299,46 +368,31 @@ class WasteSortingGUI:
                 img.save(file_path)
 
     def show_stats(self):
-        stats_window = Toplevel(self.window)
-        stats_window.title("Estadísticas")
-        stats_window.geometry("900x650")
-        stats_window.configure(bg='#ffffff')
-
-        header_frame = Frame(stats_window, bg='#a0e75a', height=80)
-        header_frame.pack(fill="x")
-        title_label = Label(header_frame, text="ESTADÍSTICAS", font=("Arial", 20, "bold"), bg='#a0e75a', fg="black")
-        title_label.pack(pady=10)
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-
-        residuos = list(residuo_contador.keys())
-        cantidades = list(residuo_contador.values())
-
-        ax.bar(residuos, cantidades, color=['#4CAF50', '#FF5722', '#2196F3', '#FFC107', '#9E9E9E'])
-
-        for i, v in enumerate(cantidades):
-            ax.text(i, v + 10, str(v), ha='center', fontweight='bold')
-
-        ax.set_title('Residuos capturados')
-        ax.set_ylabel('Unidades')
-
-        canvas = Frame(stats_window)
-        canvas.pack()
-        plt_canvas = FigureCanvasTkAgg(fig, master=canvas)
-        plt_canvas.draw()
-        plt_canvas.get_tk_widget().pack()
-
-        Button(stats_window, text="REGRESAR", font=("Arial", 12), bg="#b3f35a", fg="black", bd=0, command=stats_window.destroy).pack(pady=20)
+        # La ventana y la figura se reutilizan; solo se actualizan las barras
+        if self.stats_view is None:
+            from vista_estadisticas import VistaEstadisticas  # matplotlib se importa solo al usarla
+            self.stats_view = VistaEstadisticas(self.window, motor.contador)
+        self.stats_view.mostrar()
 
     def on_closing(self):
         self.window_closed = True
-        self.cap.release()
-        conn.close()
+        motor.cerrar()
+        escritor_estadisticas.detener()
+        base_datos.cerrar()
+        for camera in self.cameras:
+            camera.detener()
         self.window.destroy()
 
+# Iniciar el endpoint de métricas y el registro rodante si están configurados
+if PUERTO_METRICAS:
+    iniciar_servidor_metricas(METRICAS, PUERTO_METRICAS)
+if REGISTRO_METRICAS:
+    iniciar_registro_rodante(REGISTRO_METRICAS, METRICAS)
+
 # Crear la ventana principal
 root = tk.Tk()
 app = WasteSortingGUI(root)
+arranque.marcar('ventana')
 
 root.protocol("WM_DELETE_WINDOW", app.on_closing)
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,157 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from servidor_lotes import ServidorLotes
+
+# Clases del modelo entrenado en Apps/training.py, en el orden alfabético que
+# asigna flow_from_directory a las carpetas del dataset
+CLASES_MODELO = ['cardboard', 'glass', 'metal', 'paper', 'plastic', 'trash']
+
+
+class ModeloTFLite:
+    """Modelo exportado a TFLite con la misma interfaz predict_on_batch que un modelo Keras.
+
+    Usa tflite_runtime si está instalado (no necesita TensorFlow completo) y,
+    si no, el intérprete incluido en TensorFlow. Acepta modelos cuantizados con
+    entrada o salida int8/uint8.
+    """
+
+    def __init__(self, ruta_modelo, num_hilos=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self._interprete = Interpreter(model_path=ruta_modelo, num_threads=num_hilos)
+        self._interprete.allocate_tensors()
+        self._entrada = self._interprete.get_input_details()[0]
+        self._salida = self._interprete.get_output_details()[0]
+
+    def predict_on_batch(self, lote):
+        salidas = []
+        for x in lote:
+            self._interprete.set_tensor(self._entrada['index'], self._cuantizar(x[np.newaxis], self._entrada))
+            self._interprete.invoke()
+            salidas.append(self._decuantizar(self._interprete.get_tensor(self._salida['index'])[0], self._salida))
+        return np.stack(salidas)
+
+    @staticmethod
+    def _cuantizar(x, detalle):
+        if detalle['dtype'] in (np.int8, np.uint8):
+            escala, cero = detalle['quantization']
+            info = np.iinfo(detalle['dtype'])
+            return np.clip(np.round(x / escala + cero), info.min, info.max).astype(detalle['dtype'])
+        return x.astype(detalle['dtype'])
+
+    @staticmethod
+    def _decuantizar(y, detalle):
+        if detalle['dtype'] in (np.int8, np.uint8):
+            escala, cero = detalle['quantization']
+            return (y.astype(np.float32) - cero) * escala
+        return y
+
+
+class BackendRemoto:
+    """Backend que envía los frames a la API de Roboflow a través de un ClienteInferencia"""
+
+    def __init__(self, cliente, model_id):
+        self.cliente = cliente
+        self.model_id = model_id
+
+    def infer(self, frame):
+        return self.cliente.infer(frame, self.model_id)
+
+    def close(self):
+        self.cliente.close()
+
+
+class BackendLocal:
+    """Backend que clasifica los frames en el propio proceso con el modelo Keras entrenado.
+
+    Acepta el modelo original (.h5) o su versión exportada con
+    Apps/exportar-modelo.py (.tflite), que no necesita importar TensorFlow
+    completo si tflite_runtime está instalado. El modelo se carga una sola vez: en un hilo de fondo al crear el backend
+    (precargar=True) o en la primera inferencia. Devuelve el mismo formato que
+    la API de Roboflow ({'predictions': [{'class': ..., 'confidence': ...}]}),
+    sin cuadro delimitador porque el modelo es de clasificación.
+    Con max_lote > 1 las inferencias concurrentes de varios hilos se agrupan
+    en micro-lotes (ServidorLotes) y se resuelven con una sola predicción.
+    """
+
+    def __init__(self, ruta_modelo='modelo_mejorado.h5', tamano_img=224, clases=CLASES_MODELO, precargar=True,
+                 max_lote=8, max_espera=0.005):
+        self.ruta_modelo = ruta_modelo
+        self.tamano_img = tamano_img
+        self.clases = clases
+        self._modelo = None
+        self._lock = threading.Lock()
+        self.servidor_lotes = ServidorLotes(self.predecir, max_lote, max_espera) if max_lote > 1 else None
+
+        if precargar:
+            threading.Thread(target=self.cargar, daemon=True).start()
+
+    def cargar(self):
+        """Función para cargar el modelo si aún no está cargado"""
+        with self._lock:
+            if self._modelo is None:
+                if self.ruta_modelo.endswith('.tflite'):
+                    self._modelo = ModeloTFLite(self.ruta_modelo)
+                else:
+                    from tensorflow.keras.models import load_model  # TensorFlow solo se importa si se usa este backend
+                    self._modelo = load_model(self.ruta_modelo)
+        return self._modelo
+
+    def preprocesar(self, frame):
+        """Función para llevar un frame BGR de OpenCV al formato de entrada del modelo"""
+        img = cv2.resize(frame, (self.tamano_img, self.tamano_img), interpolation=cv2.INTER_AREA)
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        return img.astype(np.float32) / 255.0  # Misma normalización que en el entrenamiento
+
+    def predecir(self, lote):
+        """Función para predecir un lote ya preprocesado de forma (N, tamaño, tamaño, 3)"""
+        modelo = self.cargar()
+        with self._lock:
+            return np.asarray(modelo.predict_on_batch(lote))
+
+    def infer(self, frame):
+        x = self.preprocesar(frame)
+        if self.servidor_lotes is not None:
+            prediccion = self.servidor_lotes.enviar(x).result()
+        else:
+            prediccion = self.predecir(np.expand_dims(x, axis=0))[0]
+        return self.resultado(prediccion)
+
+    def resultado(self, prediccion):
+        """Función para convertir el vector de probabilidades al formato de resultado de Roboflow"""
+        indice = int(np.argmax(prediccion))
+        return {'predictions': [{'class': self.clases[indice], 'confidence': float(prediccion[indice])}]}
+
+    def close(self):
+        if self.servidor_lotes is not None:
+            self.servidor_lotes.detener()
+
+
+def crear_backend(tipo, api_url=None, api_key=None, model_id=None, **kwargs):
+    """Función para crear el backend indicado en la configuración ('local' o 'remoto')"""
+    if tipo == 'local':
+        return BackendLocal(os.getenv("RUTA_MODELO", "modelo_mejorado.h5"))
+    if tipo == 'remoto':
+        from cliente_inferencia import ClienteInferencia
+        return BackendRemoto(ClienteInferencia(api_url, api_key, **kwargs), model_id)
+    raise ValueError(f"Backend de inferencia desconocido: {tipo}. Usa 'local' o 'remoto'.")
+
+
+def registrar_metricas(backend, metricas):
+    """Función para exponer como métricas los contadores propios del backend (cliente HTTP o micro-lotes)"""
+    cliente_http = getattr(backend, 'cliente', None)
+    if cliente_http is not None:
+        for campo in ('solicitudes', 'errores', 'reintentos'):
+            metricas.registrar_medidor(f'residuos_roboflow_{campo}', lambda campo=campo: getattr(cliente_http.estadisticas, campo))
+        metricas.registrar_medidor('residuos_roboflow_latencia_p95_segundos',
+                                   lambda: cliente_http.estadisticas.resumen()['latencia_p95'])
+    servidor_lotes = getattr(backend, 'servidor_lotes', None)
+    if servidor_lotes is not None:
+        metricas.registrar_medidor('residuos_cola_profundidad', servidor_lotes.pendientes, cola='lotes_modelo')
@@ -0,0 +1,160 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metricas import METRICAS
+from persistencia import ESQUEMAS, migrar_waste_stats
+
+# Conexión por defecto a SQL Server
+CADENA_CONEXION_SQL_SERVER = ('DRIVER={ODBC Driver 17 for SQL Server};'
+                              'SERVER=localhost;'
+                              'DATABASE=WasteSortingDB;'
+                              'Trusted_Connection=yes;')
+
+
+class BaseDatos:
+    """Acceso a la base de datos desde un pequeño grupo de hilos, sin bloquear al llamador.
+
+    Cada hilo del grupo abre su propia conexión la primera vez que la
+    necesita y la conserva; si una consulta falla, la conexión se descarta y
+    la siguiente consulta de ese hilo abre otra. iniciar() crea las tablas en
+    segundo plano (reintentando mientras la base de datos no responda) y las
+    consultas esperan a que termine. Los resultados se entregan por callback
+    a través de `despachar`, por ejemplo para ejecutarlos en el hilo de Tk.
+    """
+
+    def __init__(self, conectar, dialecto, max_conexiones=2, despachar=None, espera_maxima=30.0):
+        self.conectar = conectar
+        self.dialecto = dialecto
+        self.espera_maxima = espera_maxima
+        self.despachar = despachar or (lambda funcion: funcion())
+        self.listo = threading.Event()
+        self._local = threading.local()
+        self._conexiones = []
+        self._lock = threading.Lock()
+        self._activo = True
+        self._executor = ThreadPoolExecutor(max_workers=max_conexiones, thread_name_prefix="base-datos")
+
+    def iniciar(self, consulta_inicial=None, al_listo=None, pausa_reintento=5.0, estacion_legado=None):
+        """Función para crear las tablas en segundo plano y, si se indica, ejecutar `consulta_inicial`
+        (sql, parámetros) antes de dar la base por lista; sus filas se entregan a `al_listo`.
+
+        Con `estacion_legado`, el histórico de waste_stats de versiones anteriores
+        se migra una sola vez a waste_rollups a nombre de esa estación.
+        """
+        def preparar():
+            while self._activo:
+                try:
+                    cursor = self._conexion().cursor()
+                    for sentencia in ESQUEMAS[self.dialecto]:
+                        cursor.execute(sentencia)
+                    if estacion_legado is not None:
+                        migrar_waste_stats(cursor, self.dialecto, estacion_legado)
+                    self._conexion().commit()
+                    filas = self._ejecutar(*consulta_inicial) if consulta_inicial else None
+                    break
+                except Exception as e:
+                    print(f"No se pudo preparar la base de datos, se reintenta en {pausa_reintento:.0f} s: {e}")
+                    self._descartar_conexion()
+                    time.sleep(pausa_reintento)
+            else:
+                return
+            self._descartar_conexion()  # Este hilo termina aquí; las consultas usan las del grupo
+            if al_listo is not None:
+                self.despachar(lambda: al_listo(filas))
+            self.listo.set()
+
+        threading.Thread(target=preparar, name="base-datos-inicio", daemon=True).start()
+
+    def conectar_cuando_lista(self):
+        """Función para abrir una conexión propia (por ejemplo para EscritorPorLotes) una vez creadas las tablas"""
+        if not self.listo.wait(self.espera_maxima):
+            raise ConnectionError("La base de datos aún no está disponible.")
+        return self.conectar()
+
+    def consultar(self, sql, parametros=(), al_terminar=None, al_fallar=None):
+        """Función para ejecutar una consulta en el grupo de hilos; devuelve un Future con las filas"""
+        def tarea():
+            if not self.listo.wait(self.espera_maxima):
+                raise ConnectionError("La base de datos aún no está disponible.")
+            try:
+                with METRICAS.cronometro('residuos_etapa_segundos', etapa='base_datos_consulta'):
+                    return self._ejecutar(sql, parametros)
+            except Exception:
+                METRICAS.incrementar('residuos_errores_total', tipo='base_datos')
+                self._descartar_conexion()
+                raise
+
+        def entregar(futuro):
+            error = futuro.exception()
+            if error is not None:
+                print(f"Error en la consulta a la base de datos: {error}")
+                if al_fallar is not None:
+                    self.despachar(lambda: al_fallar(error))
+            elif al_terminar is not None:
+                filas = futuro.result()
+                self.despachar(lambda: al_terminar(filas))
+
+        futuro = self._executor.submit(tarea)
+        futuro.add_done_callback(entregar)
+        return futuro
+
+    def cerrar(self):
+        self._activo = False
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            conexiones, self._conexiones = self._conexiones, []
+        for conexion in conexiones:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = self._local.conexion = self.conectar()
+            with self._lock:
+                self._conexiones.append(conexion)
+        return conexion
+
+    def _ejecutar(self, sql, parametros):
+        cursor = self._conexion().cursor()
+        cursor.execute(sql, parametros)
+        filas = cursor.fetchall()
+        self._conexion().commit()  # Cerrar la transacción de lectura para no retener bloqueos
+        return filas
+
+    def _descartar_conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        self._local.conexion = None
+        if conexion is None:
+            return
+        with self._lock:
+            if conexion in self._conexiones:
+                self._conexiones.remove(conexion)
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+
+def abrir_base_datos(configuracion=None, **kwargs):
+    """Función para crear el acceso a la base de datos indicada en la configuración.
+
+    Vacía usa SQL Server con CADENA_CONEXION_SQL_SERVER; 'sqlite:<ruta>'
+    usa una base SQLite local; cualquier otro valor se toma como cadena de
+    conexión ODBC de SQL Server. No se conecta hasta llamar a iniciar().
+    """
+    if configuracion and configuracion.startswith('sqlite:'):
+        import sqlite3
+        ruta = configuracion[len('sqlite:'):] or 'residuos.db'
+        conectar = lambda: sqlite3.connect(ruta, timeout=10, check_same_thread=False,
+                                           detect_types=sqlite3.PARSE_DECLTYPES)
+        return BaseDatos(conectar, 'sqlite', **kwargs)
+    cadena = configuracion or CADENA_CONEXION_SQL_SERVER
+
+    def conectar():
+        import pyodbc  # Se importa en el primer intento de conexión, ya en segundo plano
+        return pyodbc.connect(cadena)
+    return BaseDatos(conectar, 'sqlserver', **kwargs)
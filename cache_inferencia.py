@@ -0,0 +1,122 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheInferencia:
+    """Caché de resultados de inferencia indexada por el hash de la imagen codificada y el modelo.
+
+    Mantiene un nivel en memoria (LRU con tamaño máximo) y, si se indica un
+    directorio, un nivel en disco que sobrevive a los reinicios. Las entradas
+    caducan después de `ttl` segundos (None para no caducar nunca).
+    """
+
+    def __init__(self, max_entradas=512, ttl=3600, directorio=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.directorio = directorio
+        self._memoria = OrderedDict()  # clave -> (instante de creación, resultado)
+        self._lock = threading.Lock()
+
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expirados = 0
+
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    @staticmethod
+    def clave(img_bytes, model_id):
+        """Función para calcular la clave de una imagen codificada para un modelo (o endpoint completo)"""
+        h = hashlib.sha256(model_id.encode('utf-8'))
+        h.update(b'\0')
+        h.update(img_bytes)
+        return h.hexdigest()
+
+    def _vigente(self, creado):
+        return self.ttl is None or time.time() - creado < self.ttl
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], f"{clave}.json")
+
+    def obtener(self, clave):
+        """Función para obtener un resultado guardado, o None si no está o caducó"""
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is not None:
+                if self._vigente(entrada[0]):
+                    self._memoria.move_to_end(clave)
+                    self.aciertos_memoria += 1
+                    return copy.deepcopy(entrada[1])
+                del self._memoria[clave]
+                self.expirados += 1
+
+        entrada = self._leer_disco(clave)
+        with self._lock:
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.aciertos_disco += 1
+            self._insertar(clave, entrada)
+        return copy.deepcopy(entrada[1])
+
+    def guardar(self, clave, resultado):
+        """Función para guardar el resultado de una inferencia"""
+        entrada = (time.time(), copy.deepcopy(resultado))
+        with self._lock:
+            self._insertar(clave, entrada)
+        if self.directorio:
+            self._escribir_disco(clave, entrada)
+
+    def _insertar(self, clave, entrada):
+        self._memoria[clave] = entrada
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    def _leer_disco(self, clave):
+        if not self.directorio:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not self._vigente(datos['creado']):
+            with self._lock:
+                self.expirados += 1
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            return None
+        return datos['creado'], datos['resultado']
+
+    def _escribir_disco(self, clave, entrada):
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'creado': entrada[0], 'resultado': entrada[1]}, f)
+            os.replace(temporal, ruta)  # Escritura atómica: nunca se lee un archivo a medias
+        except OSError as e:
+            print(f"No se pudo guardar la caché en disco: {e}")
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos_memoria + self.aciertos_disco + self.fallos
+            return {
+                'entradas_memoria': len(self._memoria),
+                'aciertos_memoria': self.aciertos_memoria,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'expirados': self.expirados,
+                'tasa_aciertos': (self.aciertos_memoria + self.aciertos_disco) / consultas if consultas else 0.0,
+            }
@@ -0,0 +1,181 @@
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+from inferencia_tiempo_real import MedidorFPS
+
+
+class BufferFrames:
+    """Buffer circular de tamaño fijo con los frames más recientes de una cámara.
+
+    Lo escribe un único hilo de captura y lo leen cualquier número de
+    consumidores (vista previa, inferencia, grabación) sin bloquearse: cada
+    lectura solo toma el lock el tiempo de copiar una referencia. Los frames
+    se numeran de forma creciente para que un consumidor sepa si ya vio el
+    último. Los frames guardados no se modifican nunca; quien quiera dibujar
+    sobre uno debe copiarlo.
+    """
+
+    def __init__(self, capacidad=8):
+        self.capacidad = capacidad
+        self._frames = [None] * capacidad
+        self._numero = 0
+        self._cond = threading.Condition()
+
+    def agregar(self, frame):
+        with self._cond:
+            self._numero += 1
+            self._frames[self._numero % self.capacidad] = (self._numero, time.perf_counter(), frame)
+            self._cond.notify_all()
+
+    def ultimo(self):
+        """Función que devuelve (número, marca de tiempo, frame) del frame más reciente, o None si aún no hay"""
+        with self._cond:
+            return self._frames[self._numero % self.capacidad] if self._numero else None
+
+    def recientes(self, cantidad):
+        """Función que devuelve hasta `cantidad` frames recientes, del más antiguo al más nuevo"""
+        with self._cond:
+            cantidad = min(cantidad, self.capacidad, self._numero)
+            return [self._frames[n % self.capacidad] for n in range(self._numero - cantidad + 1, self._numero + 1)]
+
+    def esperar_nuevo(self, numero_visto=0, timeout=None):
+        """Función para esperar un frame posterior a `numero_visto`; devuelve None si vence el timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._numero > numero_visto, timeout):
+                return None
+            return self._frames[self._numero % self.capacidad]
+
+
+def es_dispositivo(fuente):
+    return isinstance(fuente, int) or (isinstance(fuente, str) and fuente.isdigit())
+
+
+def abrir_captura(fuente):
+    """Función para abrir un índice de cámara o un archivo/URL de video con la API de cada plataforma"""
+    if not es_dispositivo(fuente):
+        return cv2.VideoCapture(fuente)
+    if sys.platform.startswith('win'):
+        api = cv2.CAP_DSHOW
+    elif sys.platform.startswith('linux'):
+        api = cv2.CAP_V4L2
+    else:
+        api = cv2.CAP_ANY
+    return cv2.VideoCapture(int(fuente), api)
+
+
+class Camara:
+    """Lee una cámara o un video en su propio hilo y deja los frames en un BufferFrames.
+
+    El dispositivo también se abre en ese hilo (con DirectShow puede tardar
+    más de un segundo), así que crear la cámara no demora la ventana. Con un
+    archivo de video se respeta su velocidad de reproducción y se vuelve al
+    inicio al terminar, así sirve para probar la estación sin cámara. Si un
+    dispositivo deja de entregar frames se cierra y se vuelve a abrir tras
+    una pausa.
+    """
+
+    def __init__(self, fuente, nombre=None, capacidad=8, fallos_para_reabrir=30, pausa_reabrir=1.0):
+        self.fuente = fuente
+        self.nombre = nombre or str(fuente)
+        self.es_archivo = not es_dispositivo(fuente)
+        self.buffer = BufferFrames(capacidad)
+        self.fallos_para_reabrir = fallos_para_reabrir
+        self.pausa_reabrir = pausa_reabrir
+
+        self.frames_leidos = 0
+        self.errores = 0
+        self.reaperturas = 0
+        self.fps_captura = MedidorFPS()
+
+        self._cap = None
+        self.intervalo = 1.0 / 30  # Hasta que la fuente informe sus FPS
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, name=f"camara-{self.nombre}", daemon=True)
+        self._hilo.start()
+
+    def ultimo(self):
+        return self.buffer.ultimo()
+
+    def esperar_nuevo(self, numero_visto=0, timeout=None):
+        return self.buffer.esperar_nuevo(numero_visto, timeout)
+
+    def intervalo_entrega(self):
+        """Función que devuelve los segundos entre frames que la cámara entrega de verdad.
+
+        Muchas cámaras (y los drivers de DirectShow) informan 0 o 30 FPS sin
+        importar a qué ritmo entregan; se usa el ritmo medido y el informado
+        solo hasta tener la primera medición.
+        """
+        fps = self.fps_captura.fps()
+        return 1.0 / fps if fps > 0 else self.intervalo
+
+    def metricas(self):
+        return {
+            'fps_captura': self.fps_captura.fps(),
+            'frames_leidos': self.frames_leidos,
+            'errores': self.errores,
+            'reaperturas': self.reaperturas,
+        }
+
+    def detener(self):
+        self._activo = False
+        self._hilo.join(timeout=5)
+        if self._cap is not None:
+            self._cap.release()
+
+    def _abrir(self):
+        self._cap = abrir_captura(self.fuente)
+        fps = self._cap.get(cv2.CAP_PROP_FPS)
+        # Si la fuente no informa sus FPS se asumen 30
+        self.intervalo = 1.0 / fps if fps > 0 else 1.0 / 30
+
+    def _reabrir(self):
+        self._cap.release()
+        time.sleep(self.pausa_reabrir)
+        if self._activo:
+            self._abrir()
+            self.reaperturas += 1
+
+    def _bucle(self):
+        self._abrir()
+        fallos = 0
+        siguiente = time.perf_counter()
+        while self._activo:
+            ret, frame = self._cap.read()
+            if not ret:
+                if self.es_archivo and self._cap.isOpened() and self.frames_leidos:
+                    self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Fin del video: repetirlo
+                    continue
+                self.errores += 1
+                fallos += 1
+                if fallos >= self.fallos_para_reabrir:
+                    self._reabrir()
+                    fallos = 0
+                else:
+                    time.sleep(0.01)
+                continue
+
+            fallos = 0
+            self.frames_leidos += 1
+            self.fps_captura.tick()
+            self.buffer.agregar(frame)
+
+            if self.es_archivo:
+                # Un archivo se lee tan rápido como se decodifica; se espera para imitar la cámara
+                siguiente = max(siguiente + self.intervalo, time.perf_counter())
+                espera = siguiente - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+
+
+def camaras_desde_configuracion(valor=None, capacidad=8):
+    """Función para abrir las cámaras de la variable CAMARAS: índices o rutas de video separados por comas"""
+    valor = valor if valor is not None else os.getenv("CAMARAS", "2")
+    fuentes = [fuente.strip() for fuente in valor.split(',') if fuente.strip()]
+    if not fuentes:
+        raise ValueError("No se configuró ninguna cámara. Define CAMARAS, por ejemplo CAMARAS=0,1 o CAMARAS=video.mp4.")
+    return [Camara(int(fuente) if fuente.isdigit() else fuente, capacidad=capacidad) for fuente in fuentes]
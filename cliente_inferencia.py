@@ -0,0 +1,147 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import cv2
+import requests
+from requests.adapters import HTTPAdapter
+
+# API de detección de Roboflow, si no se indica otra URL
+URL_ROBOFLOW = "https://detect.roboflow.com"
+
+# Códigos HTTP que indican un fallo temporal y que vale la pena reintentar
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+def codificar_frame(frame, calidad_jpeg=95):
+    """Función para codificar un frame de OpenCV a JPEG en memoria, sin pasar por disco"""
+    ok, img_encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, calidad_jpeg])
+    if not ok:
+        raise ValueError("No se pudo codificar el frame a JPEG.")
+    return img_encoded.tobytes()
+
+
+class EstadisticasLatencia:
+    """Contadores de latencia y errores compartidos entre hilos"""
+
+    def __init__(self, ventana=1000):
+        self._lock = threading.Lock()
+        self._recientes = deque(maxlen=ventana)
+        self.solicitudes = 0
+        self.errores = 0
+        self.reintentos = 0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+
+    def registrar(self, latencia, ok=True):
+        with self._lock:
+            self.solicitudes += 1
+            if not ok:
+                self.errores += 1
+            self.latencia_total += latencia
+            self.latencia_max = max(self.latencia_max, latencia)
+            self._recientes.append(latencia)
+
+    def registrar_reintento(self):
+        with self._lock:
+            self.reintentos += 1
+
+    def resumen(self):
+        """Función para obtener un resumen de las latencias en segundos"""
+        with self._lock:
+            recientes = sorted(self._recientes)
+            resumen = {
+                'solicitudes': self.solicitudes,
+                'errores': self.errores,
+                'reintentos': self.reintentos,
+                'latencia_media': self.latencia_total / self.solicitudes if self.solicitudes else 0.0,
+                'latencia_max': self.latencia_max,
+            }
+        for nombre, q in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            resumen[f'latencia_{nombre}'] = recientes[min(len(recientes) - 1, int(q * len(recientes)))] if recientes else 0.0
+        return resumen
+
+
+class ClienteInferencia:
+    """Cliente HTTP para la API de inferencia de Roboflow.
+
+    Usa una única sesión con conexiones persistentes (keep-alive), limita el
+    número de solicitudes en vuelo, aplica un timeout a cada solicitud y
+    reintenta los fallos temporales con espera exponencial aleatoria.
+    Si no se indica `api_url` se usa la variable de entorno ROBOFLOW_API_URL
+    (por ejemplo para apuntar a un servidor local de pruebas) o, sin ella,
+    URL_ROBOFLOW; una URL pasada explícitamente siempre se respeta. Si se pasa una
+    CacheInferencia, las imágenes ya vistas se responden sin llamar a la API.
+    """
+
+    def __init__(self, api_url=None, api_key=None, max_en_vuelo=4, timeout=(3.05, 10.0),
+                 reintentos=2, espera_base=0.25, espera_max=2.0, calidad_jpeg=95, cache=None):
+        self.api_url = (api_url or os.getenv("ROBOFLOW_API_URL", URL_ROBOFLOW)).rstrip('/')
+        self.api_key = api_key
+        self.calidad_jpeg = calidad_jpeg
+        self.cache = cache
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.estadisticas = EstadisticasLatencia()
+
+        self._en_vuelo = threading.BoundedSemaphore(max_en_vuelo)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_en_vuelo, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def infer(self, imagen, model_id):
+        """Función para hacer la inferencia de una imagen (frame de OpenCV, bytes JPEG o ruta de archivo)"""
+        if isinstance(imagen, str):
+            with open(imagen, 'rb') as f:
+                imagen = f.read()
+        elif not isinstance(imagen, (bytes, bytearray)):
+            imagen = codificar_frame(imagen, self.calidad_jpeg)
+
+        if self.cache is None:
+            return self._post(imagen, model_id)
+
+        # El endpoint completo forma parte de la clave: el mismo model_id en otro servidor es otro modelo
+        clave = self.cache.clave(imagen, f"{self.api_url}/{model_id}")
+        result = self.cache.obtener(clave)
+        if result is None:
+            result = self._post(imagen, model_id)
+            if result is not None:
+                self.cache.guardar(clave, result)
+        return result
+
+    def _post(self, img_bytes, model_id):
+        url = f"{self.api_url}/{model_id}"
+        for intento in range(self.reintentos + 1):
+            if intento > 0:
+                self.estadisticas.registrar_reintento()
+                time.sleep(random.uniform(0, min(self.espera_max, self.espera_base * 2 ** intento)))
+
+            inicio = time.perf_counter()
+            try:
+                with self._en_vuelo:
+                    response = self.session.post(
+                        url,
+                        params={'api_key': self.api_key},
+                        files={'file': ('image.jpg', img_bytes, 'image/jpeg')},
+                        timeout=self.timeout,
+                    )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.estadisticas.registrar(time.perf_counter() - inicio, ok=False)
+                print(f"Error de conexión con {url}: {e}")
+                continue
+
+            ok = response.status_code == 200
+            self.estadisticas.registrar(time.perf_counter() - inicio, ok=ok)
+            if ok:
+                return response.json()
+            if response.status_code not in CODIGOS_REINTENTABLES:
+                break
+        return None
+
+    def close(self):
+        self.session.close()
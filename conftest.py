@@ -0,0 +1,17 @@
+# Permite importar los módulos de la raíz del repositorio desde tests/
+import pytest
+
+
+class EscritorEnMemoria:
+    """Escritor de registros que los guarda en una lista en lugar de la base de datos"""
+
+    def __init__(self):
+        self.registros = []
+
+    def escribir(self, registro):
+        self.registros.append(registro)
+
+
+@pytest.fixture
+def escritor():
+    return EscritorEnMemoria()
@@ -0,0 +1,42 @@
+import cv2
+
+
+class DetectorCambios:
+    """Decide si un frame cambió lo suficiente respecto al último frame inferido.
+
+    Compara versiones reducidas y en escala de grises de los frames (diferencia
+    absoluta por píxel), así que cuesta una fracción de milisegundo y evita
+    enviar a la API frames repetidos de una escena estática.
+    """
+
+    def __init__(self, umbral_pixel=25, fraccion_minima=0.01, tamano=(64, 48)):
+        self.umbral_pixel = umbral_pixel        # Diferencia de intensidad para considerar un píxel cambiado
+        self.fraccion_minima = fraccion_minima  # Fracción de píxeles cambiados para considerar el frame distinto
+        self.tamano = tamano
+        self._referencia = None
+
+        self.frames_enviados = 0
+        self.frames_omitidos = 0
+
+    def _reducir(self, frame):
+        pequeno = cv2.resize(frame, self.tamano, interpolation=cv2.INTER_AREA)
+        gris = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gris, (5, 5), 0)
+
+    def debe_inferir(self, frame):
+        """Función que devuelve True si el frame debe enviarse a inferencia"""
+        reducido = self._reducir(frame)
+        if self._referencia is not None:
+            diferencia = cv2.absdiff(reducido, self._referencia)
+            cambiados = cv2.countNonZero(cv2.threshold(diferencia, self.umbral_pixel, 255, cv2.THRESH_BINARY)[1])
+            if cambiados < self.fraccion_minima * diferencia.size:
+                self.frames_omitidos += 1
+                return False
+
+        self._referencia = reducido
+        self.frames_enviados += 1
+        return True
+
+    def reiniciar(self):
+        """Función para olvidar el último frame inferido y forzar la siguiente inferencia"""
+        self._referencia = None
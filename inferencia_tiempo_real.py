@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class MedidorFPS:
+    """Mide los eventos por segundo sobre una ventana deslizante de tiempo"""
+
+    def __init__(self, ventana=2.0):
+        self.ventana = ventana
+        self._marcas = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        ahora = time.perf_counter()
+        with self._lock:
+            self._marcas.append(ahora)
+            while self._marcas and ahora - self._marcas[0] > self.ventana:
+                self._marcas.popleft()
+
+    def fps(self):
+        with self._lock:
+            if len(self._marcas) < 2:
+                return 0.0
+            return (len(self._marcas) - 1) / (self._marcas[-1] - self._marcas[0])
+
+
+class InferenciaUltimoFrame:
+    """Ejecuta la inferencia en un hilo de fondo, siempre sobre el frame más reciente.
+
+    La captura y la visualización siguen a la velocidad de la cámara: cada
+    llamada a enviar() reemplaza el frame pendiente, de modo que los frames
+    que llegan mientras hay una inferencia en curso se descartan en lugar de
+    acumularse. El último resultado se conserva para dibujarlo sobre los
+    frames siguientes hasta que llegue uno nuevo.
+    """
+
+    def __init__(self, funcion_inferencia):
+        self._inferir = funcion_inferencia
+        self._cond = threading.Condition()
+        self._pendiente = None
+        self._resultado = None
+        self._version = 0
+        self._version_leida = 0
+        self._activo = True
+
+        self.frames_enviados = 0
+        self.frames_descartados = 0
+        self.fps_inferencia = MedidorFPS()
+
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, frame):
+        """Función para proponer un frame a inferir; reemplaza al pendiente si aún no se procesó"""
+        copia = frame.copy()  # El llamador puede dibujar sobre el frame original
+        with self._cond:
+            self.frames_enviados += 1
+            if self._pendiente is not None:
+                self.frames_descartados += 1
+            self._pendiente = copia
+            self._cond.notify()
+
+    def ultimo_resultado(self):
+        """Función para obtener el último resultado y si es nuevo desde la llamada anterior"""
+        with self._cond:
+            nuevo = self._version != self._version_leida
+            self._version_leida = self._version
+            return self._resultado, nuevo
+
+    def metricas(self):
+        return {
+            'fps_inferencia': self.fps_inferencia.fps(),
+            'frames_enviados': self.frames_enviados,
+            'frames_descartados': self.frames_descartados,
+        }
+
+    def detener(self):
+        with self._cond:
+            self._activo = False
+            self._cond.notify()
+        self._hilo.join(timeout=5)
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while self._activo and self._pendiente is None:
+                    self._cond.wait()
+                if not self._activo:
+                    return
+                frame, self._pendiente = self._pendiente, None
+
+            try:
+                resultado = self._inferir(frame)
+            except Exception as e:
+                print(f"Error en la inferencia: {e}")
+                continue
+
+            self.fps_inferencia.tick()
+            with self._cond:
+                self._resultado = resultado
+                self._version += 1
+
+
+def dibujar_metricas(frame, fps_vista, metricas):
+    """Función para mostrar en el frame los FPS de visualización e inferencia y los frames descartados"""
+    texto = (f"Vista: {fps_vista:.1f} FPS | Inferencia: {metricas['fps_inferencia']:.1f} FPS | "
+             f"Descartados: {metricas['frames_descartados']}")
+    cv2.putText(frame, texto, (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
@@ -0,0 +1,246 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+# Límites por defecto (en segundos) de los histogramas de duración de etapas
+LIMITES_SEGUNDOS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+
+class Histograma:
+    """Histograma acumulado con límites fijos, seguro entre hilos"""
+
+    def __init__(self, limites):
+        self.limites = list(limites)
+        self._cuentas = [0] * (len(self.limites) + 1)  # La última cubeta es "mayor que el último límite"
+        self._lock = threading.Lock()
+        self.total = 0
+        self.suma = 0.0
+
+    def observar(self, valor):
+        with self._lock:
+            self._cuentas[bisect_left(self.limites, valor)] += 1
+            self.total += 1
+            self.suma += valor
+
+    def cuentas(self):
+        """Función que devuelve [(límite superior, cantidad)], con float('inf') para la última cubeta"""
+        with self._lock:
+            return list(zip(self.limites + [float('inf')], self._cuentas))
+
+    def media(self):
+        with self._lock:
+            return self.suma / self.total if self.total else 0.0
+
+
+def _etiquetas(etiquetas):
+    return tuple(sorted(etiquetas.items()))
+
+
+def _escapar(valor):
+    # El formato de texto de Prometheus solo admite \\, \" y \n escapados dentro de un valor
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formato_etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in pares) + '}'
+
+
+class Metricas:
+    """Registro de métricas de la estación: contadores, medidores e histogramas de duración.
+
+    Cada operación es un diccionario y un lock, así que el costo es de unos
+    microsegundos y se puede dejar activado de forma permanente. Los medidores
+    pueden registrarse como funciones que se evalúan solo al exportar (por
+    ejemplo, el tamaño de una cola o los FPS).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._medidores = {}
+        self._funciones = {}
+        self._histogramas = {}
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def fijar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            self._medidores[(nombre, _etiquetas(etiquetas))] = valor
+
+    def registrar_medidor(self, nombre, funcion, **etiquetas):
+        """Función para registrar un medidor cuyo valor se calcula al exportar"""
+        with self._lock:
+            self._funciones[(nombre, _etiquetas(etiquetas))] = funcion
+
+    def observar(self, nombre, valor, limites=LIMITES_SEGUNDOS, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        histograma = self._histogramas.get(clave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(clave, Histograma(limites))
+        histograma.observar(valor)
+
+    @contextmanager
+    def cronometro(self, nombre, **etiquetas):
+        """Función para medir la duración de un bloque como histograma en segundos"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def _valores_medidores(self):
+        with self._lock:
+            medidores = dict(self._medidores)
+            funciones = dict(self._funciones)
+        for clave, funcion in funciones.items():
+            try:
+                medidores[clave] = float(funcion())
+            except Exception:
+                pass  # Un medidor que falla no debe romper la exportación del resto
+        return medidores
+
+    def resumen(self):
+        """Función que devuelve una instantánea de todas las métricas (para el registro rodante)"""
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = dict(self._histogramas)
+        return {
+            'contadores': {f"{n}{_formato_etiquetas(e)}": v for (n, e), v in contadores.items()},
+            'medidores': {f"{n}{_formato_etiquetas(e)}": v for (n, e), v in self._valores_medidores().items()},
+            'histogramas': {f"{n}{_formato_etiquetas(e)}": {'total': h.total, 'media': h.media()}
+                            for (n, e), h in histogramas.items()},
+        }
+
+    def texto_prometheus(self):
+        """Función que exporta las métricas en el formato de texto de Prometheus"""
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted(self._histogramas.items(), key=lambda item: item[0])
+        medidores = sorted(self._valores_medidores().items())
+
+        lineas = []
+        tipos_escritos = set()
+
+        def tipo(nombre, tipo_metrica):
+            if nombre not in tipos_escritos:
+                tipos_escritos.add(nombre)
+                lineas.append(f"# TYPE {nombre} {tipo_metrica}")
+
+        for (nombre, etiquetas), valor in contadores:
+            tipo(nombre, 'counter')
+            lineas.append(f"{nombre}{_formato_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), valor in medidores:
+            tipo(nombre, 'gauge')
+            lineas.append(f"{nombre}{_formato_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), histograma in histogramas:
+            tipo(nombre, 'histogram')
+            acumulado = 0
+            for limite, cantidad in histograma.cuentas():
+                acumulado += cantidad
+                le = '+Inf' if limite == float('inf') else f"{limite:g}"
+                lineas.append(f"{nombre}_bucket{_formato_etiquetas(etiquetas, [('le', le)])} {acumulado}")
+            lineas.append(f"{nombre}_sum{_formato_etiquetas(etiquetas)} {histograma.suma}")
+            lineas.append(f"{nombre}_count{_formato_etiquetas(etiquetas)} {histograma.total}")
+        return "\n".join(lineas) + "\n"
+
+
+# Registro global compartido por todos los módulos de la estación
+METRICAS = Metricas()
+
+
+class TiemposArranque:
+    """Hitos del arranque, en segundos desde `inicio` (un valor de time.perf_counter()).
+
+    Si `lanzado` es la hora (time.time()) en que se lanzó el proceso, el
+    reporte también incluye cuánto tardó cada hito desde el lanzamiento,
+    lo que suma el arranque del intérprete.
+    """
+
+    def __init__(self, inicio, lanzado=None):
+        self.inicio = inicio
+        self.lanzado = lanzado
+        self._desfase = time.time() - time.perf_counter()  # Para pasar perf_counter a hora del reloj
+        self.hitos = []
+
+    def marcar(self, nombre):
+        self.hitos.append((nombre, time.perf_counter() - self.inicio))
+
+    def reporte(self, presupuesto=None):
+        """Función que devuelve los hitos y si el último quedó dentro del presupuesto en segundos"""
+        reporte = {'hitos': {nombre: segundos for nombre, segundos in self.hitos}}
+        if self.lanzado is not None:
+            antes_del_inicio = self.inicio + self._desfase - self.lanzado
+            reporte['hitos_desde_lanzamiento'] = {nombre: segundos + antes_del_inicio for nombre, segundos in self.hitos}
+        if presupuesto is not None and self.hitos:
+            reporte['presupuesto'] = presupuesto
+            reporte['dentro_del_presupuesto'] = self.hitos[-1][1] <= presupuesto
+        return reporte
+
+    def publicar(self, metricas=METRICAS):
+        for nombre, segundos in self.hitos:
+            metricas.fijar('residuos_arranque_segundos', segundos, hito=nombre)
+
+
+# Puerto por defecto del endpoint /metrics de la estación (9100 es el de node_exporter)
+PUERTO_METRICAS = 9477
+
+
+def iniciar_servidor_metricas(metricas=METRICAS, puerto=PUERTO_METRICAS, host='127.0.0.1'):
+    """Función para exponer /metrics en formato Prometheus desde un hilo de fondo.
+
+    Si el puerto no está disponible se avisa y se sigue sin el endpoint
+    (devuelve None): las métricas no deben impedir que la estación arranque.
+    """
+
+    class ManejadorMetricas(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            cuerpo = metricas.texto_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        servidor = ThreadingHTTPServer((host, puerto), ManejadorMetricas)
+    except OSError as e:
+        print(f"No se pudo abrir el endpoint de métricas en {host}:{puerto}, se sigue sin él: {e}")
+        return None
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def iniciar_registro_rodante(ruta, metricas=METRICAS, intervalo=60, max_bytes=5_000_000, copias=3):
+    """Función para escribir periódicamente una instantánea JSON de las métricas en un log rotativo"""
+    logger = logging.getLogger('metricas_estacion')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    manejador = RotatingFileHandler(ruta, maxBytes=max_bytes, backupCount=copias, encoding='utf-8')
+    manejador.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(manejador)
+
+    def bucle():
+        while True:
+            time.sleep(intervalo)
+            logger.info(json.dumps(metricas.resumen(), ensure_ascii=False))
+
+    threading.Thread(target=bucle, daemon=True).start()
+    return logger
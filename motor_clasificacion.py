@@ -0,0 +1,130 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+import procesamiento
+from metricas import METRICAS
+from persistencia import evento_deteccion
+
+
+class MotorClasificacion:
+    """Clasificación de residuos sin interfaz: inferencia, conteo por clase y guardado de detecciones.
+
+    Lo comparten la interfaz de Tk y el servicio sin interfaz (servicio.py).
+    Todos sus métodos se pueden llamar desde cualquier hilo. Cada frame
+    clasificado devuelve sus detecciones con la clase ya mapeada a la
+    categoría de la estación, en el formato de Roboflow ('class',
+    'confidence' y, si hay cuadro, 'x', 'y', 'width', 'height'), y se avisa
+    a los suscriptores con un evento por frame.
+    """
+
+    def __init__(self, backend, escritor, estacion, max_en_vuelo=3):
+        self.backend = backend  # Backend de inferencia, o un Future que lo devuelve
+        self.escritor = escritor
+        self.estacion = estacion
+        self.contador = {categoria: 0 for categoria in procesamiento.CATEGORIAS}
+        self._lock = threading.Lock()
+        self._suscriptores = []
+        self._executor = ThreadPoolExecutor(max_workers=max_en_vuelo, thread_name_prefix="inferencia")
+
+    def _backend(self):
+        return self.backend.result() if isinstance(self.backend, Future) else self.backend
+
+    def inferir(self, frame):
+        """Función para obtener el resultado crudo del backend (None si falló)"""
+        with METRICAS.cronometro('residuos_etapa_segundos', etapa='inferencia'):
+            try:
+                result = self._backend().infer(frame)
+            except Exception as e:
+                print(f"Error en la inferencia: {e}")
+                result = None
+        if result is None:
+            METRICAS.incrementar('residuos_errores_total', tipo='inferencia')
+        return result
+
+    def registrar(self, resultado, camara, momento):
+        """Función para contar y guardar las detecciones de un resultado; devuelve las detecciones mapeadas.
+
+        Si la inferencia falló o su resultado no trae una lista de
+        predicciones, el frame cuenta como un 'otros' sin caja. Una lista
+        vacía es un frame válido sin objetos y no cuenta nada.
+        """
+        predicciones = resultado.get('predictions') if isinstance(resultado, dict) else None
+        if isinstance(predicciones, list):
+            detecciones = [dict(pred, **{'class': procesamiento.map_class_name(pred['class']), 'model_class': pred['class']})
+                           for pred in predicciones]
+            registros = [(deteccion['class'], deteccion) for deteccion in detecciones]
+        else:
+            detecciones = []
+            registros = [('otros', None)]
+
+        with self._lock:
+            for clase, _ in registros:
+                self.contador[clase] += 1
+        for clase, deteccion in registros:
+            METRICAS.incrementar('residuos_detecciones_total', clase=clase)
+            self.escritor.escribir(evento_deteccion(self.estacion, camara, clase, momento, deteccion))
+
+        self._publicar({'estacion': self.estacion, 'camara': camara, 'momento': momento.isoformat(),
+                        'detecciones': detecciones})
+        return detecciones
+
+    def clasificar(self, frame, camara='api', momento=None):
+        """Función para inferir, contar y guardar un frame; devuelve sus detecciones"""
+        momento = momento or datetime.now()
+        return self.registrar(self.inferir(frame), camara, momento)
+
+    def capturar_y_clasificar(self, camara, num_capturas, timeout=2.0):
+        """Función para clasificar `num_capturas` frames nuevos de una Camara; devuelve [(frame, detecciones)].
+
+        Cada frame se envía en cuanto llega al buffer de la cámara, así las
+        inferencias de las capturas se solapan entre sí. Los frames devueltos
+        son copias y se pueden dibujar.
+        """
+        pendientes = []
+        numero = 0
+        momento = datetime.now()
+        for _ in range(num_capturas):
+            with METRICAS.cronometro('residuos_etapa_segundos', etapa='camara'):
+                ultimo = camara.esperar_nuevo(numero, timeout=timeout)
+            if ultimo is None:
+                METRICAS.incrementar('residuos_errores_total', tipo='camara')
+                break
+            numero, _, frame = ultimo
+            frame = frame.copy()
+            pendientes.append((frame, self._executor.submit(self.inferir, frame)))
+        return [(frame, self.registrar(futuro.result(), camara.nombre, momento)) for frame, futuro in pendientes]
+
+    def suscribir(self, funcion):
+        """Función para recibir cada evento de clasificación; `funcion` se llama desde el hilo que clasificó"""
+        with self._lock:
+            self._suscriptores.append(funcion)
+
+    def desuscribir(self, funcion):
+        with self._lock:
+            if funcion in self._suscriptores:
+                self._suscriptores.remove(funcion)
+
+    def _publicar(self, evento):
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for funcion in suscriptores:
+            try:
+                funcion(evento)
+            except Exception as e:
+                print(f"Error al notificar una detección: {e}")
+
+    def sumar_totales(self, filas):
+        """Función para sumar a los contadores los totales (clase, cantidad) leídos de la base de datos"""
+        with self._lock:
+            for clase, cantidad in filas:
+                self.contador[clase if clase in self.contador else 'otros'] += cantidad
+
+    def totales(self):
+        with self._lock:
+            return dict(self.contador)
+
+    def cerrar(self):
+        self._executor.shutdown(wait=False)
+        if not isinstance(self.backend, Future) or (self.backend.done() and self.backend.exception() is None):
+            self._backend().close()
@@ -0,0 +1,451 @@
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from metricas import METRICAS
+
+# Una fila por detección. Solo se insertan filas, nunca se actualizan; los totales de
+# cualquier intervalo salen de agregar por timestamp (y opcionalmente estación o clase)
+ESQUEMA_EVENTOS_SQL_SERVER = [
+    '''
+    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='waste_events' AND xtype='U')
+    CREATE TABLE waste_events (
+        id BIGINT PRIMARY KEY IDENTITY(1,1),
+        station NVARCHAR(100) NOT NULL,
+        camera NVARCHAR(100) NOT NULL,
+        class NVARCHAR(20) NOT NULL,
+        confidence REAL NULL,
+        box_x REAL NULL,
+        box_y REAL NULL,
+        box_width REAL NULL,
+        box_height REAL NULL,
+        timestamp DATETIME2 NOT NULL
+    )
+    ''',
+    '''
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='ix_waste_events_timestamp')
+    CREATE INDEX ix_waste_events_timestamp ON waste_events (timestamp) INCLUDE (class)
+    ''',
+    '''
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='ix_waste_events_station_timestamp')
+    CREATE INDEX ix_waste_events_station_timestamp ON waste_events (station, timestamp) INCLUDE (class)
+    ''',
+]
+
+# Totales por hora ('h') y por día ('d') de cada estación y clase. Se mantienen en la misma
+# transacción que inserta las detecciones, así el histórico no tiene que recorrer waste_events.
+# Al crear la tabla se rellena con las detecciones que ya existían
+ESQUEMA_RESUMENES_SQL_SERVER = [
+    '''
+    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='waste_rollups' AND xtype='U')
+    BEGIN
+        CREATE TABLE waste_rollups (
+            granularity CHAR(1) NOT NULL,
+            bucket DATETIME2 NOT NULL,
+            station NVARCHAR(100) NOT NULL,
+            class NVARCHAR(20) NOT NULL,
+            count INT NOT NULL,
+            PRIMARY KEY (granularity, bucket, station, class)
+        );
+        INSERT INTO waste_rollups (granularity, bucket, station, class, count)
+        SELECT 'h', DATEADD(hour, DATEDIFF(hour, 0, timestamp), 0), station, class, COUNT(*)
+        FROM waste_events
+        GROUP BY DATEADD(hour, DATEDIFF(hour, 0, timestamp), 0), station, class;
+        INSERT INTO waste_rollups (granularity, bucket, station, class, count)
+        SELECT 'd', CAST(CAST(timestamp AS date) AS datetime2), station, class, COUNT(*)
+        FROM waste_events
+        GROUP BY CAST(timestamp AS date), station, class;
+    END
+    ''',
+]
+
+# Mismas tablas para la base SQLite local (pruebas o estaciones sin SQL Server)
+ESQUEMA_SQLITE = [
+    '''
+    CREATE TABLE IF NOT EXISTS waste_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        station TEXT NOT NULL,
+        camera TEXT NOT NULL,
+        class TEXT NOT NULL,
+        confidence REAL,
+        box_x REAL,
+        box_y REAL,
+        box_width REAL,
+        box_height REAL,
+        timestamp TIMESTAMP NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS ix_waste_events_timestamp ON waste_events (timestamp, class)',
+    'CREATE INDEX IF NOT EXISTS ix_waste_events_station_timestamp ON waste_events (station, timestamp, class)',
+    '''
+    CREATE TABLE IF NOT EXISTS waste_rollups (
+        granularity TEXT NOT NULL,
+        bucket TIMESTAMP NOT NULL,
+        station TEXT NOT NULL,
+        class TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (granularity, bucket, station, class)
+    )
+    ''',
+]
+
+# Migraciones de datos ya aplicadas, para ejecutar cada una una sola vez
+ESQUEMA_MIGRACIONES = {
+    'sqlserver': '''
+    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='waste_migrations' AND xtype='U')
+    CREATE TABLE waste_migrations (
+        name NVARCHAR(100) PRIMARY KEY,
+        applied_at DATETIME2 NOT NULL
+    )
+    ''',
+    'sqlite': '''
+    CREATE TABLE IF NOT EXISTS waste_migrations (
+        name TEXT PRIMARY KEY,
+        applied_at TIMESTAMP NOT NULL
+    )
+    ''',
+}
+
+ESQUEMAS = {
+    'sqlserver': ESQUEMA_EVENTOS_SQL_SERVER + ESQUEMA_RESUMENES_SQL_SERVER + [ESQUEMA_MIGRACIONES['sqlserver']],
+    'sqlite': ESQUEMA_SQLITE + [ESQUEMA_MIGRACIONES['sqlite']],
+}
+
+# Consulta que devuelve una fila si existe la tabla waste_stats de versiones anteriores
+SQL_EXISTE_WASTE_STATS = {
+    'sqlserver': "SELECT name FROM sysobjects WHERE name='waste_stats' AND xtype='U'",
+    'sqlite': "SELECT name FROM sqlite_master WHERE type='table' AND name='waste_stats'",
+}
+
+# Cláusula para limitar una consulta ordenada a las primeras ? filas
+PAGINACION = {
+    'sqlserver': 'OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY',
+    'sqlite': 'LIMIT ?',
+}
+
+# Categorías en el orden de las columnas del histórico; cualquier otra clase se suma a 'otros'
+CLASES_HISTORICO = ['plástico', 'vidrio', 'papel', 'metal', 'otros']
+
+# Totales acumulados de una estación por clase, para iniciar los contadores al arrancar
+SQL_TOTALES_ESTACION = '''
+    SELECT class, SUM(count)
+    FROM waste_rollups
+    WHERE granularity = 'd' AND station = ?
+    GROUP BY class
+'''
+
+SQL_INSERTAR_EVENTO = '''
+    INSERT INTO waste_events (station, camera, class, confidence, box_x, box_y, box_width, box_height, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def evento_deteccion(estacion, camara, clase, momento, prediccion=None):
+    """Función para armar la fila de waste_events de una detección (sin predicción: ninguna caja ni confianza)"""
+    prediccion = prediccion or {}
+    return (estacion, camara, clase, prediccion.get('confidence'),
+            prediccion.get('x'), prediccion.get('y'), prediccion.get('width'), prediccion.get('height'),
+            momento)
+
+
+def consulta_pagina_historico(granularidad, desde, hasta, clave=None, tamano=200, dialecto='sqlserver'):
+    """Función que devuelve (sql, parámetros) de una página del histórico de los días desde..hasta, ambos incluidos.
+
+    Con granularidad 'h' o 'd' cada fila es (bucket, plástico, vidrio, papel,
+    metal, otros) leída de waste_rollups; con None cada fila es una detección
+    (id, timestamp, station, camera, class, confidence). El rango es
+    semiabierto y la paginación es por clave: `clave` es la que devolvió
+    clave_siguiente() para la página anterior, así cada página es una
+    búsqueda en el índice sin importar cuántas filas se saltan.
+    """
+    hasta = hasta + timedelta(days=1)
+    if granularidad is None:
+        sql = '''
+            SELECT id, timestamp, station, camera, class, confidence
+            FROM waste_events
+            WHERE timestamp >= ? AND timestamp < ?
+        '''
+        parametros = [desde, hasta]
+        if clave is not None:
+            sql += ' AND (timestamp > ? OR (timestamp = ? AND id > ?))'
+            parametros += [clave[0], clave[0], clave[1]]
+        sql += ' ORDER BY timestamp, id'
+    else:
+        conocidas = CLASES_HISTORICO[:-1]
+        columnas = ''.join(f', SUM(CASE WHEN class = ? THEN count ELSE 0 END)' for _ in conocidas)
+        sql = f'''
+            SELECT bucket{columnas}, SUM(CASE WHEN class NOT IN ({', '.join('?' for _ in conocidas)}) THEN count ELSE 0 END)
+            FROM waste_rollups
+            WHERE granularity = ? AND bucket >= ? AND bucket < ?
+        '''
+        parametros = conocidas + conocidas + [granularidad, desde, hasta]
+        if clave is not None:
+            sql += ' AND bucket > ?'
+            parametros.append(clave)
+        sql += ' GROUP BY bucket ORDER BY bucket'
+    sql += ' ' + PAGINACION[dialecto]
+    parametros.append(tamano)
+    return sql, parametros
+
+
+def clave_siguiente(granularidad, filas):
+    """Función que devuelve la clave para pedir la página que sigue a `filas`"""
+    ultima = filas[-1]
+    return ultima[0] if granularidad is not None else (ultima[1], ultima[0])
+
+
+def actualizar_resumenes(cursor, eventos):
+    """Función para sumar un lote de filas de waste_events a waste_rollups con el cursor de la transacción"""
+    cuentas = Counter()
+    for estacion, _, clase, *_, momento in eventos:
+        _contar(cuentas, estacion, clase, momento, 1)
+    _sumar_resumenes(cursor, cuentas)
+
+
+def _contar(cuentas, estacion, clase, momento, cantidad):
+    hora = momento.replace(minute=0, second=0, microsecond=0)
+    cuentas[('h', hora, estacion, clase)] += cantidad
+    cuentas[('d', hora.replace(hour=0), estacion, clase)] += cantidad
+
+
+def _sumar_resumenes(cursor, cuentas):
+    for (granularidad, inicio, estacion, clase), cantidad in cuentas.items():
+        cursor.execute('''
+            UPDATE waste_rollups SET count = count + ?
+            WHERE granularity = ? AND bucket = ? AND station = ? AND class = ?
+        ''', (cantidad, granularidad, inicio, estacion, clase))
+        if cursor.rowcount == 0:
+            cursor.execute('''
+                INSERT INTO waste_rollups (granularity, bucket, station, class, count)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (granularidad, inicio, estacion, clase, cantidad))
+
+
+def migrar_waste_stats(cursor, dialecto, estacion):
+    """Función para pasar una sola vez el histórico de waste_stats a waste_rollups, a nombre de `estacion`.
+
+    Las versiones anteriores guardaban en waste_stats los contadores acumulados
+    desde que se abrió la aplicación (plástico, vidrio, metal, papel, otros),
+    una fila por solicitud. La cantidad de cada solicitud es la diferencia con
+    la fila anterior; si un contador baja, la aplicación se reinició y la
+    cantidad es el valor de la fila. No crea filas en waste_events, así que
+    esas solicitudes aparecen en los modos por hora y por día pero no en el
+    detalle. La migración queda registrada en waste_migrations; el llamador
+    hace el commit. Devuelve el número de filas de waste_stats leídas.
+    """
+    cursor.execute('SELECT COUNT(*) FROM waste_migrations WHERE name = ?', ('waste_stats',))
+    if cursor.fetchone()[0]:
+        return 0
+    cursor.execute(SQL_EXISTE_WASTE_STATS[dialecto])
+    filas = []
+    if cursor.fetchone() is not None:
+        cursor.execute('''
+            SELECT plastic_count, glass_count, metal_count, paper_count, others_count, timestamp
+            FROM waste_stats
+            ORDER BY id
+        ''')
+        filas = cursor.fetchall()
+
+    clases = ['plástico', 'vidrio', 'metal', 'papel', 'otros']
+    anteriores = [0] * len(clases)
+    cuentas = Counter()
+    for *valores, momento in filas:
+        valores = [valor or 0 for valor in valores]
+        for clase, valor, anterior in zip(clases, valores, anteriores):
+            cantidad = valor - anterior if valor >= anterior else valor
+            if cantidad:
+                _contar(cuentas, estacion, clase, momento, cantidad)
+        anteriores = valores
+    _sumar_resumenes(cursor, cuentas)
+    cursor.execute('INSERT INTO waste_migrations (name, applied_at) VALUES (?, ?)', ('waste_stats', datetime.now()))
+    if filas:
+        print(f"Histórico de waste_stats migrado a waste_rollups: {len(filas)} registros")
+    return len(filas)
+
+
+def es_error_de_datos(error):
+    """Función que indica si un error DB-API se debe al contenido de los registros y no a la conexión.
+
+    Se compara por nombre de clase para aceptar los de cualquier driver
+    (pyodbc, sqlite3) sin importarlos. ProgrammingError no cuenta: pyodbc lo
+    usa para todo SQLSTATE 42xxx, como una tabla que no existe o un permiso
+    denegado, que afectan a todos los registros por igual.
+    """
+    return any(clase.__name__ in ('IntegrityError', 'DataError') for clase in type(error).__mro__)
+
+
+class EscritorPorLotes:
+    """Escribe registros en la base de datos desde un hilo de fondo, agrupados en lotes.
+
+    escribir() solo agrega el registro a la cola, así que el hilo que lo llama
+    (normalmente el de Tk) nunca espera a la base de datos. El hilo de fondo
+    inserta con executemany cuando se juntan `max_lote` registros o cada
+    `intervalo` segundos, en una sola transacción por lote. Si la base de
+    datos no responde, los registros se conservan en memoria hasta
+    `max_pendientes` (se descartan los más antiguos) y se reintenta con una
+    conexión nueva en el siguiente ciclo. Esa cola vive solo en memoria: si
+    el proceso termina antes de que la base de datos vuelva, se pierde.
+
+    Si lo que falla es el contenido del lote (IntegrityError o DataError,
+    por ejemplo un valor más largo que su columna), el lote no se reintenta
+    tal cual: se escribe registro por registro y los que la base de datos
+    rechaza se apartan en `rechazados` (los últimos `max_rechazados`) para no
+    bloquear a los que vienen detrás. Cualquier otro error, incluidos los de
+    esquema o permisos (ProgrammingError), conserva el lote y se reintenta.
+    Cada escritura se mide en residuos_etapa_segundos{etapa="base_datos"} y
+    cada fallo suma a residuos_errores_total{tipo="base_datos"}.
+
+    `conectar` es una función que devuelve una conexión DB-API con parámetros
+    `?`, por ejemplo pyodbc.connect o sqlite3.connect. `al_insertar(cursor,
+    lote)`, si se indica, se ejecuta dentro de la misma transacción que el
+    lote (por ejemplo actualizar_resumenes).
+    """
+
+    def __init__(self, conectar, sql_insercion, max_lote=100, intervalo=1.0, max_pendientes=10000, al_insertar=None,
+                 max_rechazados=100):
+        self.conectar = conectar
+        self.sql_insercion = sql_insercion
+        self.al_insertar = al_insertar
+        self.max_lote = max_lote
+        self.intervalo = intervalo
+        self._pendientes = deque(maxlen=max_pendientes)
+        self.rechazados = deque(maxlen=max_rechazados)
+        self._cond = threading.Condition()
+        self._conn = None
+        self._activo = True
+
+        self.registros_escritos = 0
+        self.registros_descartados = 0
+        self.registros_rechazados = 0
+        self.lotes_escritos = 0
+        self.errores = 0
+
+        self._hilo = threading.Thread(target=self._bucle, name="escritor-bd", daemon=True)
+        self._hilo.start()
+
+    def escribir(self, registro):
+        """Función para encolar una tupla con los parámetros de sql_insercion"""
+        with self._cond:
+            if len(self._pendientes) == self._pendientes.maxlen:
+                self.registros_descartados += 1
+            self._pendientes.append(registro)
+            if len(self._pendientes) >= self.max_lote:
+                self._cond.notify()
+
+    def pendientes(self):
+        with self._cond:
+            return len(self._pendientes)
+
+    def metricas(self):
+        return {
+            'pendientes': self.pendientes(),
+            'registros_escritos': self.registros_escritos,
+            'registros_descartados': self.registros_descartados,
+            'registros_rechazados': self.registros_rechazados,
+            'lotes_escritos': self.lotes_escritos,
+            'errores': self.errores,
+        }
+
+    def _vaciar(self):
+        # Solo se llama desde el hilo de fondo, que es el único que usa la conexión
+        while True:
+            with self._cond:
+                lote = [self._pendientes.popleft() for _ in range(min(self.max_lote, len(self._pendientes)))]
+            if not lote:
+                return True
+            restantes = self._escribir_lote(lote)
+            if restantes:
+                self._devolver(restantes)
+                return False
+
+    def _devolver(self, lote):
+        # El lote vuelve al frente de la cola; si mientras tanto se llenó, se pierden sus registros más antiguos
+        with self._cond:
+            espacio = self._pendientes.maxlen - len(self._pendientes)
+            conservar = lote[max(0, len(lote) - espacio):]
+            self.registros_descartados += len(lote) - len(conservar)
+            self._pendientes.extendleft(reversed(conservar))
+
+    def detener(self, timeout=5):
+        """Función para detener el hilo tras un último intento de escribir lo pendiente"""
+        with self._cond:
+            self._activo = False
+            self._cond.notify()
+        self._hilo.join(timeout=timeout)
+        if not self._hilo.is_alive():
+            self._descartar_conexion()  # Si sigue escribiendo, la conexión aún es suya
+
+    def _escribir_lote(self, lote):
+        """Función para escribir un lote; devuelve los registros que quedan pendientes (vacío si se escribió)"""
+        try:
+            self._insertar(lote)
+            return []
+        except Exception as e:
+            self._contar_error()
+            if not es_error_de_datos(e):
+                print(f"Error al guardar en la base de datos ({len(lote)} registros pendientes): {e}")
+                self._descartar_conexion()
+                return lote
+            print(f"La base de datos rechazó un lote de {len(lote)} registros, se escriben uno por uno: {e}")
+            self._deshacer()
+
+        for i, registro in enumerate(lote):
+            try:
+                self._insertar([registro])
+            except Exception as e:
+                if not es_error_de_datos(e):
+                    print(f"Error al guardar en la base de datos ({len(lote) - i} registros pendientes): {e}")
+                    self._contar_error()
+                    self._descartar_conexion()
+                    return lote[i:]
+                print(f"Registro rechazado por la base de datos: {registro!r}: {e}")
+                self._deshacer()
+                self._contar_error()
+                self.registros_rechazados += 1
+                self.rechazados.append((registro, str(e)))
+        return []
+
+    def _contar_error(self):
+        self.errores += 1
+        METRICAS.incrementar('residuos_errores_total', tipo='base_datos')
+
+    def _insertar(self, lote):
+        with METRICAS.cronometro('residuos_etapa_segundos', etapa='base_datos'):
+            if self._conn is None:
+                self._conn = self.conectar()
+            cursor = self._conn.cursor()
+            if hasattr(cursor, 'fast_executemany'):
+                cursor.fast_executemany = True  # pyodbc: enviar el lote completo en un solo viaje
+            cursor.executemany(self.sql_insercion, lote)
+            if self.al_insertar is not None:
+                self.al_insertar(cursor, lote)
+            self._conn.commit()
+        self.registros_escritos += len(lote)
+        self.lotes_escritos += 1
+
+    def _deshacer(self):
+        try:
+            self._conn.rollback()
+        except Exception:
+            self._descartar_conexion()
+
+    def _descartar_conexion(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                if self._activo:
+                    self._cond.wait_for(lambda: not self._activo or len(self._pendientes) >= self.max_lote,
+                                        self.intervalo)
+                activo = self._activo
+            if not self._vaciar() and activo:
+                time.sleep(self.intervalo)  # La base de datos falló: esperar antes de reintentar
+            if not activo:
+                return
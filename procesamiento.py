@@ -0,0 +1,27 @@
+import cv2
+
+# Mapeo de las clases de los modelos a las categorías de residuos de la estación
+CLASS_MAPPING = {'bottle': 'plástico', 'can': 'metal', 'glass': 'vidrio', 'paper': 'papel',
+                 # Clases del modelo local (modelo_mejorado.h5)
+                 'plastic': 'plástico', 'metal': 'metal', 'cardboard': 'papel'}
+
+
+# Categorías de residuos de la estación, en el orden en que se muestran
+CATEGORIAS = ['plástico', 'vidrio', 'metal', 'papel', 'otros']
+
+
+def map_class_name(class_name):
+    """Función para mapear la clase del modelo a la categoría de residuo"""
+    return CLASS_MAPPING.get(class_name, 'otros')
+
+
+def draw_boxes_on_frame(frame, predictions):
+    """Función para dibujar los cuadros de detección en el frame"""
+    for pred in predictions:
+        if 'x' in pred and 'y' in pred and 'width' in pred and 'height' in pred:
+            x = int(pred['x'] - pred['width'] / 2)
+            y = int(pred['y'] - pred['height'] / 2)
+            width = int(pred['width'])
+            height = int(pred['height'])
+            cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 255, 0), 2)
+    return frame
@@ -0,0 +1,228 @@
+import os
+import json
+import asyncio
+import platform
+from urllib.parse import urlsplit, parse_qs
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from backends_inferencia import crear_backend, registrar_metricas
+from cache_inferencia import CacheInferencia
+from captura_camaras import camaras_desde_configuracion
+from persistencia import EscritorPorLotes, SQL_INSERTAR_EVENTO, SQL_TOTALES_ESTACION, actualizar_resumenes
+from base_datos import abrir_base_datos
+from motor_clasificacion import MotorClasificacion
+from metricas import METRICAS, PUERTO_METRICAS, iniciar_servidor_metricas
+
+# Tamaño máximo de una imagen enviada a /clasificar
+MAX_CUERPO = 20 * 1024 * 1024
+
+# Capturas máximas por solicitud a /capturar: cada una ocupa la cámara hasta 2 s
+MAX_CAPTURAS = 10
+
+ESTADOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+class ServicioClasificacion:
+    """Expone un MotorClasificacion por HTTP en localhost, sin interfaz gráfica.
+
+    Cada conexión se atiende en el bucle de asyncio y la inferencia corre en
+    hilos (como mucho `max_en_vuelo` a la vez), así muchos clientes pueden
+    compartir un solo motor ya cargado. Rutas:
+
+        GET  /salud                          estado del servicio
+        GET  /estadisticas                   totales por categoría y métricas de la estación
+        POST /clasificar?camara=<nombre>     cuerpo: imagen JPEG o PNG; devuelve sus detecciones
+        POST /capturar?camara=<n>&capturas=<n>  captura de una cámara de la estación y clasifica
+                                             (entre 1 y `max_capturas` capturas)
+        GET  /detecciones                    eventos de cada frame clasificado (text/event-stream)
+    """
+
+    def __init__(self, motor, camaras=(), num_capturas=3, max_en_vuelo=8, max_capturas=MAX_CAPTURAS):
+        self.motor = motor
+        self.camaras = {camara.nombre: camara for camara in camaras}
+        self.num_capturas = num_capturas
+        self.max_capturas = max(max_capturas, num_capturas)
+        self.max_en_vuelo = max_en_vuelo
+        self._limite = None
+
+    async def iniciar(self, host='127.0.0.1', puerto=8500):
+        self._limite = asyncio.Semaphore(self.max_en_vuelo)  # Se crea dentro del bucle que lo usa
+        return await asyncio.start_server(self._atender, host, puerto)
+
+    async def _en_hilo(self, funcion, *parametros):
+        async with self._limite:
+            return await asyncio.get_running_loop().run_in_executor(None, funcion, *parametros)
+
+    async def _atender(self, reader, writer):
+        try:
+            linea = await reader.readline()
+            metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+            cabeceras = {}
+            while True:
+                linea = await reader.readline()
+                if linea in (b'\r\n', b'\n', b''):
+                    break
+                clave, _, valor = linea.decode('latin-1').partition(':')
+                cabeceras[clave.strip().lower()] = valor.strip()
+            largo = int(cabeceras.get('content-length', 0))
+            if largo > MAX_CUERPO:
+                await self._responder(writer, 413, {'error': 'Imagen demasiado grande.'})
+                return
+            cuerpo = await reader.readexactly(largo) if largo else b''
+            partes = urlsplit(ruta)
+            consulta = {clave: valores[0] for clave, valores in parse_qs(partes.query).items()}
+            await self._enrutar(writer, metodo, partes.path, consulta, cuerpo)
+        except (ValueError, asyncio.IncompleteReadError):
+            await self._responder(writer, 400, {'error': 'Solicitud mal formada.'})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Error al atender una solicitud: {e}")
+            await self._responder(writer, 503, {'error': str(e)})
+        finally:
+            writer.close()
+
+    async def _enrutar(self, writer, metodo, ruta, consulta, cuerpo):
+        rutas = {
+            '/salud': ('GET', self._salud),
+            '/estadisticas': ('GET', self._estadisticas),
+            '/clasificar': ('POST', self._clasificar),
+            '/capturar': ('POST', self._capturar),
+            '/detecciones': ('GET', self._detecciones),
+        }
+        if ruta not in rutas:
+            await self._responder(writer, 404, {'error': f'Ruta desconocida: {ruta}'})
+            return
+        metodo_esperado, manejador = rutas[ruta]
+        if metodo != metodo_esperado:
+            await self._responder(writer, 405, {'error': f'Usa {metodo_esperado} en {ruta}.'})
+            return
+        await manejador(writer, consulta, cuerpo)
+
+    async def _responder(self, writer, estado, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False, default=str).encode('utf-8')
+        writer.write(f"HTTP/1.1 {estado} {ESTADOS[estado]}\r\n"
+                     "Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(cuerpo)}\r\n"
+                     "Connection: close\r\n\r\n".encode('latin-1') + cuerpo)
+        await writer.drain()
+
+    async def _salud(self, writer, consulta, cuerpo):
+        await self._responder(writer, 200, {'estado': 'ok', 'estacion': self.motor.estacion,
+                                            'camaras': list(self.camaras)})
+
+    async def _estadisticas(self, writer, consulta, cuerpo):
+        await self._responder(writer, 200, {'estacion': self.motor.estacion, 'totales': self.motor.totales(),
+                                            'metricas': METRICAS.resumen()})
+
+    async def _clasificar(self, writer, consulta, cuerpo):
+        frame = cv2.imdecode(np.frombuffer(cuerpo, np.uint8), cv2.IMREAD_COLOR) if cuerpo else None
+        if frame is None:
+            await self._responder(writer, 400, {'error': 'El cuerpo debe ser una imagen JPEG o PNG.'})
+            return
+        detecciones = await self._en_hilo(self.motor.clasificar, frame, consulta.get('camara', 'api'))
+        await self._responder(writer, 200, {'detecciones': detecciones})
+
+    async def _capturar(self, writer, consulta, cuerpo):
+        if not self.camaras:
+            await self._responder(writer, 503, {'error': 'El servicio no tiene cámaras configuradas (CAMARAS).'})
+            return
+        nombre = consulta.get('camara', next(iter(self.camaras)))
+        if nombre not in self.camaras:
+            await self._responder(writer, 404, {'error': f'Cámara desconocida: {nombre}'})
+            return
+        try:
+            capturas = int(consulta.get('capturas', self.num_capturas))
+        except ValueError:
+            capturas = 0
+        if not 1 <= capturas <= self.max_capturas:
+            await self._responder(writer, 400, {'error': f'capturas debe ser un entero entre 1 y {self.max_capturas}.'})
+            return
+        resultados = await self._en_hilo(self.motor.capturar_y_clasificar, self.camaras[nombre], capturas)
+        await self._responder(writer, 200, {'camara': nombre,
+                                            'capturas': [{'detecciones': detecciones} for _, detecciones in resultados]})
+
+    async def _detecciones(self, writer, consulta, cuerpo):
+        loop = asyncio.get_running_loop()
+        cola = asyncio.Queue(maxsize=100)
+
+        def encolar(evento):
+            if cola.full():
+                cola.get_nowait()  # Un cliente lento pierde los eventos más antiguos, no frena al motor
+            cola.put_nowait(evento)
+
+        def al_clasificar(evento):
+            loop.call_soon_threadsafe(encolar, evento)
+
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        self.motor.suscribir(al_clasificar)
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    evento = await asyncio.wait_for(cola.get(), timeout=15)
+                    writer.write(f"data: {json.dumps(evento, ensure_ascii=False, default=str)}\n\n".encode('utf-8'))
+                except asyncio.TimeoutError:
+                    writer.write(b": sigo aqui\n\n")  # Mantiene viva la conexión y detecta clientes que se fueron
+                await writer.drain()
+        finally:
+            self.motor.desuscribir(al_clasificar)
+
+
+async def servir(servicio, host, puerto):
+    servidor = await servicio.iniciar(host, puerto)
+    print(f"Servicio de clasificación en http://{host}:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    load_dotenv()
+
+    backend_tipo = os.getenv("BACKEND_INFERENCIA", "remoto")
+    api_key = os.getenv("PRIVATE_API_KEY")
+    if api_key is None and backend_tipo == "remoto":
+        raise ValueError("La API Key no se encontró. Asegúrate de que el archivo .env contiene PRIVATE_API_KEY correctamente.")
+    num_capturas = int(os.getenv("NUM_CAPTURAS", "3"))
+    # El servicio y la interfaz (Deteccion-Capturas.py) cargan cada uno su propio motor y abren
+    # las mismas cámaras, así que en una estación debe correr solo uno de los dos. Aun así sus
+    # valores por defecto no chocan: otra estación en la base de datos y otro puerto de métricas
+    estacion = os.getenv("ESTACION", f"{platform.node() or 'estacion'}-servicio")
+    # Sin CAMARAS el servicio solo clasifica las imágenes que recibe
+    camaras = camaras_desde_configuracion(os.environ["CAMARAS"]) if os.getenv("CAMARAS") else []
+    puerto_metricas = int(os.getenv("PUERTO_METRICAS", str(PUERTO_METRICAS + 1)))
+
+    backend = crear_backend(backend_tipo, None, api_key, "10k/1",
+                            max_en_vuelo=num_capturas, cache=CacheInferencia(max_entradas=256, ttl=600))
+    registrar_metricas(backend, METRICAS)
+    if hasattr(backend, 'cargar'):
+        backend.cargar()  # Cargar el modelo local antes de aceptar clientes
+
+    base_datos = abrir_base_datos(os.getenv("BASE_DATOS"))
+    escritor = EscritorPorLotes(base_datos.conectar_cuando_lista, SQL_INSERTAR_EVENTO, al_insertar=actualizar_resumenes)
+    motor = MotorClasificacion(backend, escritor, estacion, max_en_vuelo=num_capturas)
+    base_datos.iniciar(consulta_inicial=(SQL_TOTALES_ESTACION, [estacion]), al_listo=motor.sumar_totales)
+
+    if puerto_metricas:
+        iniciar_servidor_metricas(METRICAS, puerto_metricas)
+
+    servicio = ServicioClasificacion(motor, camaras, num_capturas=num_capturas)
+    try:
+        asyncio.run(servir(servicio, '127.0.0.1', int(os.getenv("PUERTO_SERVICIO", "8500"))))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        motor.cerrar()
+        escritor.detener()
+        base_datos.cerrar()
+        for camara in camaras:
+            camara.detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metricas import Histograma
+
+
+class ServidorLotes:
+    """Agrupa en micro-lotes las solicitudes de varios hilos para un modelo local.
+
+    Cada llamada a enviar() devuelve un Future. Un hilo de fondo toma la primera
+    solicitud de la cola y espera como máximo `max_espera` segundos a que
+    lleguen más, hasta `max_lote`; luego hace una única predicción para todo el
+    lote y resuelve los futures. Los histogramas de tamaño de lote y de espera
+    en cola sirven para ajustar los dos parámetros. Tras detener() los
+    futures que no llegaron a procesarse, y los de cualquier envío posterior,
+    terminan con RuntimeError en lugar de quedar esperando.
+    """
+
+    def __init__(self, funcion_prediccion, max_lote=16, max_espera=0.01):
+        self._predecir = funcion_prediccion
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._detenido = False
+
+        self.hist_tamano_lote = Histograma([1, 2, 4, 8, 16, 32, 64])
+        self.hist_espera_cola = Histograma([0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5])
+
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, entrada):
+        """Función para encolar una entrada ya preprocesada; devuelve un Future con su predicción"""
+        futuro = Future()
+        with self._lock:
+            if self._detenido:
+                futuro.set_exception(RuntimeError("El servidor de lotes está detenido."))
+            else:
+                self._cola.put((entrada, futuro, time.perf_counter()))
+        return futuro
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def detener(self, timeout=5):
+        with self._lock:
+            if self._detenido:
+                return
+            self._detenido = True
+            self._cola.put(None)
+        self._hilo.join(timeout=timeout)
+
+        # Lo que el hilo no llegó a tomar (si el join venció) no se va a procesar
+        centinela = False
+        while True:
+            try:
+                solicitud = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if solicitud is None:
+                centinela = True
+                continue
+            solicitud[1].set_exception(RuntimeError("El servidor de lotes se detuvo antes de procesar la solicitud."))
+        if centinela:
+            self._cola.put(None)  # El hilo sigue ocupado: que termine al volver a la cola
+
+    def _bucle(self):
+        while True:
+            primero = self._cola.get()
+            if primero is None:
+                return
+            lote = [primero]
+            limite = time.perf_counter() + self.max_espera
+            fin = False
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    solicitud = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if solicitud is None:
+                    fin = True
+                    break
+                lote.append(solicitud)
+
+            self._procesar(lote)
+            if fin:
+                return
+
+    def _procesar(self, lote):
+        inicio = time.perf_counter()
+        for _, _, encolado in lote:
+            self.hist_espera_cola.observar(inicio - encolado)
+        self.hist_tamano_lote.observar(len(lote))
+
+        try:
+            predicciones = self._predecir(np.stack([entrada for entrada, _, _ in lote]))
+        except Exception as e:
+            for _, futuro, _ in lote:
+                futuro.set_exception(e)
+            return
+
+        for (_, futuro, _), prediccion in zip(lote, predicciones):
+            futuro.set_result(prediccion)
+
+    def resumen(self):
+        """Función para mostrar los histogramas de tamaño de lote y espera en cola"""
+        lineas = [f"Tamaño de lote (media {self.hist_tamano_lote.media():.2f}):"]
+        lineas += [f"  <= {limite:g}: {cantidad}" for limite, cantidad in self.hist_tamano_lote.cuentas()]
+        lineas.append(f"Espera en cola (media {self.hist_espera_cola.media() * 1000:.2f} ms):")
+        lineas += [f"  <= {limite * 1000:g} ms: {cantidad}" for limite, cantidad in self.hist_espera_cola.cuentas()]
+        return "\n".join(lineas)
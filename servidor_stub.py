@@ -0,0 +1,72 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Servidor HTTP local que imita la API de detección de Roboflow, para pruebas y
+# benchmarks sin red ni API Key. Responde siempre las mismas predicciones después
+# de una latencia configurable; opcionalmente las primeras solicitudes reciben
+# códigos de error, para probar los reintentos.
+
+PREDICCIONES_STUB = {
+    'predictions': [
+        {'x': 320, 'y': 240, 'width': 120, 'height': 200, 'confidence': 0.91, 'class': 'bottle'},
+        {'x': 150, 'y': 300, 'width': 80, 'height': 90, 'confidence': 0.78, 'class': 'can'},
+    ]
+}
+
+
+def crear_manejador(latencia, respuesta, codigos=()):
+    cuerpo = json.dumps(respuesta).encode('utf-8')
+    codigos = list(codigos)
+    lock = threading.Lock()
+
+    class ManejadorStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Permite conexiones keep-alive como la API real
+        disable_nagle_algorithm = True  # Sin esto cada respuesta suma ~40 ms de ACK retrasado
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if latencia:
+                time.sleep(latencia)
+            with lock:
+                codigo = codigos.pop(0) if codigos else 200
+            if codigo != 200:
+                self.send_response(codigo)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    return ManejadorStub
+
+
+def iniciar_servidor_stub(latencia=0.05, puerto=0, respuesta=PREDICCIONES_STUB, codigos=()):
+    """Función para iniciar el servidor en un hilo de fondo; devuelve (servidor, url base).
+
+    `codigos` son los códigos HTTP de las primeras solicitudes (por ejemplo
+    [503, 503]); las siguientes se responden con 200 y `respuesta`.
+    """
+    servidor = ThreadingHTTPServer(('127.0.0.1', puerto), crear_manejador(latencia, respuesta, codigos))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+
+if __name__ == '__main__':
+    # Uso: python servidor_stub.py [puerto] [latencia en segundos]
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else 9001
+    latencia = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    servidor, url = iniciar_servidor_stub(latencia, puerto)
+    print(f"Servidor stub en {url} (latencia {latencia * 1000:.0f} ms). Usa ROBOFLOW_API_URL={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
@@ -0,0 +1,33 @@
+import time
+
+import numpy as np
+
+from captura_camaras import Camara
+
+
+class CapturaLenta:
+    """Cámara que informa 30 FPS pero entrega un frame cada 50 ms"""
+
+    def read(self):
+        time.sleep(0.05)
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def get(self, propiedad):
+        return 30.0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+def test_el_intervalo_de_entrega_usa_el_ritmo_medido(monkeypatch):
+    monkeypatch.setattr('captura_camaras.abrir_captura', lambda fuente: CapturaLenta())
+    camara = Camara(0)
+    try:
+        time.sleep(0.3)
+        assert camara.intervalo == 1.0 / 30
+        assert 0.04 < camara.intervalo_entrega() < 0.08
+    finally:
+        camara.detener()
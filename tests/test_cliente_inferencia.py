@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import cliente_inferencia
+from cache_inferencia import CacheInferencia
+from cliente_inferencia import ClienteInferencia
+from servidor_stub import iniciar_servidor_stub, PREDICCIONES_STUB
+
+IMAGEN = np.zeros((32, 32, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    # Registrar las esperas entre reintentos en lugar de dormir; uniform devuelve su máximo
+    registradas = []
+    monkeypatch.setattr(cliente_inferencia.time, 'sleep', registradas.append)
+    monkeypatch.setattr(cliente_inferencia.random, 'uniform', lambda a, b: b)
+    return registradas
+
+
+def crear_cliente(codigos, **kwargs):
+    servidor, url = iniciar_servidor_stub(latencia=0, codigos=codigos)
+    return servidor, ClienteInferencia(url, 'prueba', **kwargs)
+
+
+def test_reintenta_fallos_temporales_con_espera_exponencial(esperas):
+    servidor, cliente = crear_cliente([503, 502], reintentos=2, espera_base=0.1, espera_max=0.3)
+    try:
+        assert cliente.infer(IMAGEN, 'modelo/1') == PREDICCIONES_STUB
+    finally:
+        cliente.close()
+        servidor.shutdown()
+    assert esperas == [0.2, 0.3]  # base * 2 ** intento, acotada por espera_max
+    resumen = cliente.estadisticas.resumen()
+    assert resumen['solicitudes'] == 3
+    assert resumen['errores'] == 2
+    assert resumen['reintentos'] == 2
+
+
+def test_devuelve_none_al_agotar_los_reintentos(esperas):
+    servidor, cliente = crear_cliente([503] * 5, reintentos=2, espera_base=0.01)
+    try:
+        assert cliente.infer(IMAGEN, 'modelo/1') is None
+    finally:
+        cliente.close()
+        servidor.shutdown()
+    assert cliente.estadisticas.resumen()['solicitudes'] == 3
+    assert len(esperas) == 2
+
+
+def test_no_reintenta_errores_del_cliente(esperas):
+    servidor, cliente = crear_cliente([400], reintentos=2)
+    try:
+        assert cliente.infer(IMAGEN, 'modelo/1') is None
+    finally:
+        cliente.close()
+        servidor.shutdown()
+    assert cliente.estadisticas.resumen()['solicitudes'] == 1
+    assert esperas == []
+
+
+def test_la_url_explicita_tiene_prioridad_sobre_el_entorno(monkeypatch):
+    monkeypatch.setenv('ROBOFLOW_API_URL', 'http://entorno.invalid')
+    assert ClienteInferencia('http://127.0.0.1:9001/', 'clave').api_url == 'http://127.0.0.1:9001'
+    assert ClienteInferencia(None, 'clave').api_url == 'http://entorno.invalid'
+    monkeypatch.delenv('ROBOFLOW_API_URL')
+    assert ClienteInferencia(api_key='clave').api_url == cliente_inferencia.URL_ROBOFLOW
+
+
+def test_la_cache_no_comparte_resultados_entre_endpoints():
+    cache = CacheInferencia()
+    servidor_a, url_a = iniciar_servidor_stub(latencia=0)
+    servidor_b, url_b = iniciar_servidor_stub(latencia=0, codigos=[503])
+    cliente_a = ClienteInferencia(url_a, 'prueba', reintentos=0, cache=cache)
+    cliente_b = ClienteInferencia(url_b, 'prueba', reintentos=0, cache=cache)
+    try:
+        assert cliente_a.infer(IMAGEN, 'modelo/1') == PREDICCIONES_STUB
+        assert cliente_b.infer(IMAGEN, 'modelo/1') is None  # Consulta su propio servidor
+        assert cliente_a.infer(IMAGEN, 'modelo/1') == PREDICCIONES_STUB
+    finally:
+        cliente_a.close()
+        cliente_b.close()
+        servidor_a.shutdown()
+        servidor_b.shutdown()
+    assert cliente_b.estadisticas.resumen()['solicitudes'] == 1
+    assert cache.aciertos_memoria == 1
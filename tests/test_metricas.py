@@ -0,0 +1,20 @@
+import socket
+
+from metricas import Metricas, iniciar_servidor_metricas
+
+
+def test_los_valores_de_etiqueta_se_escapan_en_el_texto_de_prometheus():
+    metricas = Metricas()
+    metricas.incrementar('residuos_errores_total', camara='C:\\videos\\"prueba"\nfin.mp4')
+    linea = [linea for linea in metricas.texto_prometheus().splitlines() if linea.startswith('residuos_errores_total')]
+    assert linea == ['residuos_errores_total{camara="C:\\\\videos\\\\\\"prueba\\"\\nfin.mp4"} 1']
+
+
+def test_un_puerto_ocupado_no_impide_seguir_sin_endpoint():
+    ocupado = socket.socket()
+    ocupado.bind(('127.0.0.1', 0))
+    ocupado.listen()
+    try:
+        assert iniciar_servidor_metricas(Metricas(), ocupado.getsockname()[1]) is None
+    finally:
+        ocupado.close()
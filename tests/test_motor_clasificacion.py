@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from motor_clasificacion import MotorClasificacion
+
+
+class BackendSinModelo:
+    def infer(self, frame):
+        return None
+
+    def close(self):
+        pass
+
+
+def crear_motor(escritor):
+    return MotorClasificacion(BackendSinModelo(), escritor, 'e1')
+
+
+def test_lista_vacia_de_predicciones_no_cuenta_nada(escritor):
+    motor = crear_motor(escritor)
+    detecciones = motor.registrar({'predictions': []}, 'cam', datetime(2024, 5, 1))
+    assert detecciones == []
+    assert sum(motor.totales().values()) == 0
+    assert escritor.registros == []
+    motor.cerrar()
+
+
+def test_resultado_fallido_o_mal_formado_cuenta_como_otros(escritor):
+    motor = crear_motor(escritor)
+    for resultado in (None, {}, {'predictions': None}, 'error'):
+        assert motor.registrar(resultado, 'cam', datetime(2024, 5, 1)) == []
+    assert motor.totales()['otros'] == 4
+    assert [registro[2] for registro in escritor.registros] == ['otros'] * 4
+    motor.cerrar()
+
+
+def test_predicciones_se_cuentan_por_categoria(escritor):
+    motor = crear_motor(escritor)
+    resultado = {'predictions': [{'class': 'bottle', 'confidence': 0.9}, {'class': 'can', 'confidence': 0.8}]}
+    detecciones = motor.registrar(resultado, 'cam', datetime(2024, 5, 1))
+    assert [deteccion['class'] for deteccion in detecciones] == ['plástico', 'metal']
+    assert motor.totales()['plástico'] == 1 and motor.totales()['metal'] == 1
+    assert motor.totales()['otros'] == 0
+    motor.cerrar()
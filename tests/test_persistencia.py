@@ -0,0 +1,120 @@
+import sqlite3
+import time
+from datetime import datetime
+
+from persistencia import (EscritorPorLotes, ESQUEMA_MIGRACIONES, ESQUEMA_SQLITE, SQL_INSERTAR_EVENTO,
+                          actualizar_resumenes, evento_deteccion, migrar_waste_stats)
+
+
+def conectar_sqlite(ruta):
+    def conectar():
+        conexion = sqlite3.connect(ruta, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+        for sentencia in ESQUEMA_SQLITE:
+            conexion.execute(sentencia)
+        conexion.commit()
+        return conexion
+    return conectar
+
+
+def esperar(condicion, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not condicion() and time.monotonic() < limite:
+        time.sleep(0.01)
+    return condicion()
+
+
+def test_un_registro_invalido_no_bloquea_el_lote(tmp_path):
+    ruta = str(tmp_path / 'residuos.db')
+    escritor = EscritorPorLotes(conectar_sqlite(ruta), SQL_INSERTAR_EVENTO, max_lote=6, intervalo=0.05,
+                                al_insertar=actualizar_resumenes)
+    momento = datetime(2024, 5, 1, 10, 30)
+    eventos = [evento_deteccion('e1', 'cam', 'papel', momento) for _ in range(5)]
+    eventos.insert(2, evento_deteccion('e1', None, 'vidrio', momento))  # camera NOT NULL
+    for evento in eventos:
+        escritor.escribir(evento)
+    escritor.escribir(evento_deteccion('e1', 'cam', 'metal', momento))
+
+    assert esperar(lambda: escritor.registros_escritos == 6)
+    escritor.detener()
+    assert escritor.registros_rechazados == 1
+    assert escritor.rechazados[0][0][1] is None
+    assert escritor.pendientes() == 0
+
+    conexion = sqlite3.connect(ruta)
+    assert conexion.execute('SELECT COUNT(*) FROM waste_events').fetchone()[0] == 6
+    assert conexion.execute("SELECT SUM(count) FROM waste_rollups WHERE granularity = 'd'").fetchone()[0] == 6
+    assert conexion.execute("SELECT COUNT(*) FROM waste_rollups WHERE class = 'vidrio'").fetchone()[0] == 0
+
+
+def test_los_registros_esperan_mientras_no_hay_conexion(tmp_path):
+    ruta = str(tmp_path / 'residuos.db')
+    disponible = {'valor': False}
+    conectar = conectar_sqlite(ruta)
+
+    def conectar_cuando_disponible():
+        if not disponible['valor']:
+            raise sqlite3.OperationalError('sin conexión')
+        return conectar()
+
+    escritor = EscritorPorLotes(conectar_cuando_disponible, SQL_INSERTAR_EVENTO, max_lote=2, intervalo=0.05)
+    for _ in range(3):
+        escritor.escribir(evento_deteccion('e1', 'cam', 'papel', datetime(2024, 5, 1)))
+    assert esperar(lambda: escritor.errores > 0)
+    assert escritor.pendientes() == 3
+    assert escritor.registros_rechazados == 0
+
+    disponible['valor'] = True
+    assert esperar(lambda: escritor.registros_escritos == 3)
+    escritor.detener()
+
+
+def test_un_error_de_esquema_conserva_el_lote():
+    class ErrorDeEsquema(Exception):
+        pass
+    ErrorDeEsquema.__name__ = 'ProgrammingError'  # Como pyodbc con una tabla inexistente (42S02)
+
+    class Cursor:
+        def executemany(self, sql, lote):
+            raise ErrorDeEsquema('Invalid object name waste_events')
+
+    class Conexion:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    escritor = EscritorPorLotes(Conexion, SQL_INSERTAR_EVENTO, max_lote=3, intervalo=0.05)
+    for _ in range(3):
+        escritor.escribir(evento_deteccion('e1', 'cam', 'papel', datetime(2024, 5, 1)))
+    assert esperar(lambda: escritor.errores >= 2)
+    escritor.detener()
+    assert escritor.registros_rechazados == 0
+    assert escritor.pendientes() == 3
+
+
+def test_migrar_waste_stats_suma_las_diferencias_una_sola_vez(tmp_path):
+    conexion = conectar_sqlite(str(tmp_path / 'residuos.db'))()
+    conexion.execute(ESQUEMA_MIGRACIONES['sqlite'])
+    conexion.execute('''
+        CREATE TABLE waste_stats (id INTEGER PRIMARY KEY, plastic_count INT, glass_count INT, metal_count INT,
+                                  paper_count INT, others_count INT, timestamp TIMESTAMP)
+    ''')
+    # Contadores acumulados: dos solicitudes, un reinicio de la aplicación y otra solicitud al día siguiente
+    instantaneas = [(1, 0, 0, 0, 1, datetime(2024, 5, 1, 9, 10)),
+                    (3, 0, 1, 0, 1, datetime(2024, 5, 1, 9, 40)),
+                    (1, 1, 0, 0, 0, datetime(2024, 5, 2, 8, 0))]
+    conexion.executemany('INSERT INTO waste_stats (plastic_count, glass_count, metal_count, paper_count, others_count, '
+                         'timestamp) VALUES (?, ?, ?, ?, ?, ?)', instantaneas)
+    cursor = conexion.cursor()
+    assert migrar_waste_stats(cursor, 'sqlite', 'e1') == 3
+    assert migrar_waste_stats(cursor, 'sqlite', 'e1') == 0
+    conexion.commit()
+
+    por_dia = conexion.execute('''
+        SELECT bucket, class, count FROM waste_rollups WHERE granularity = 'd' ORDER BY bucket, class
+    ''').fetchall()
+    assert [(str(bucket)[:10], clase, cantidad) for bucket, clase, cantidad in por_dia] == [
+        ('2024-05-01', 'metal', 1), ('2024-05-01', 'otros', 1), ('2024-05-01', 'plástico', 3),
+        ('2024-05-02', 'plástico', 1), ('2024-05-02', 'vidrio', 1)]
+    assert conexion.execute("SELECT SUM(count) FROM waste_rollups WHERE granularity = 'h'").fetchone()[0] == 7
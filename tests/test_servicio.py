@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import cv2
+import numpy as np
+
+from motor_clasificacion import MotorClasificacion
+from servicio import ServicioClasificacion
+
+
+class BackendFijo:
+    def infer(self, frame):
+        return {'predictions': [{'class': 'bottle', 'confidence': 0.9, 'x': 5, 'y': 5, 'width': 4, 'height': 4}]}
+
+    def close(self):
+        pass
+
+
+class CamaraSinFrames:
+    nombre = 'cam0'
+
+    def esperar_nuevo(self, numero_visto=0, timeout=None):
+        return None
+
+
+async def solicitar(puerto, metodo, ruta, cuerpo=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+    writer.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode('latin-1')
+                 + cuerpo)
+    await writer.drain()
+    respuesta = await reader.read()
+    writer.close()
+    cabecera, _, datos = respuesta.partition(b'\r\n\r\n')
+    return int(cabecera.split(b' ', 2)[1]), json.loads(datos)
+
+
+def ejecutar_con_servicio(prueba, escritor):
+    motor = MotorClasificacion(BackendFijo(), escritor, 'e1')
+    servicio = ServicioClasificacion(motor, [CamaraSinFrames()], num_capturas=3)
+
+    async def principal():
+        servidor = await servicio.iniciar('127.0.0.1', 0)
+        try:
+            return await prueba(servidor.sockets[0].getsockname()[1], motor)
+        finally:
+            servidor.close()
+            await servidor.wait_closed()
+
+    try:
+        return asyncio.run(principal())
+    finally:
+        motor.cerrar()
+
+
+def test_clasificar_y_estadisticas(escritor):
+    _, jpeg = cv2.imencode('.jpg', np.zeros((16, 16, 3), np.uint8))
+
+    async def prueba(puerto, motor):
+        estado, datos = await solicitar(puerto, 'POST', '/clasificar?camara=api', jpeg.tobytes())
+        assert estado == 200
+        assert [deteccion['class'] for deteccion in datos['detecciones']] == ['plástico']
+
+        estado, datos = await solicitar(puerto, 'GET', '/estadisticas')
+        assert estado == 200
+        assert datos['estacion'] == 'e1'
+        assert datos['totales']['plástico'] == 1
+        assert len(escritor.registros) == 1
+
+    ejecutar_con_servicio(prueba, escritor)
+
+
+def test_clasificar_rechaza_un_cuerpo_que_no_es_imagen(escritor):
+    async def prueba(puerto, motor):
+        estado, _ = await solicitar(puerto, 'POST', '/clasificar', b'no es una imagen')
+        assert estado == 400
+        assert sum(motor.totales().values()) == 0
+
+    ejecutar_con_servicio(prueba, escritor)
+
+
+def test_capturar_rechaza_cantidades_fuera_de_rango(escritor):
+    async def prueba(puerto, motor):
+        for capturas in ('0', '1000', 'muchas'):
+            estado, datos = await solicitar(puerto, 'POST', f'/capturar?capturas={capturas}')
+            assert estado == 400, capturas
+            assert 'capturas' in datos['error']
+        estado, datos = await solicitar(puerto, 'POST', '/capturar?capturas=1')
+        assert estado == 200
+        assert datos == {'camara': 'cam0', 'capturas': []}
+
+    ejecutar_con_servicio(prueba, escritor)
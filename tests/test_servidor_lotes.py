@@ -0,0 +1,37 @@
+import threading
+
+import numpy as np
+import pytest
+
+from servidor_lotes import ServidorLotes
+
+
+def test_agrupa_y_resuelve_las_solicitudes():
+    servidor = ServidorLotes(lambda lote: lote.sum(axis=1), max_lote=4, max_espera=0.05)
+    futuros = [servidor.enviar(np.full(3, i, dtype=np.float32)) for i in range(4)]
+    assert [futuro.result(timeout=5) for futuro in futuros] == [0, 3, 6, 9]
+    servidor.detener()
+
+
+def test_enviar_tras_detener_falla_en_lugar_de_bloquear():
+    servidor = ServidorLotes(lambda lote: lote)
+    servidor.detener()
+    with pytest.raises(RuntimeError):
+        servidor.enviar(np.zeros(1)).result(timeout=1)
+
+
+def test_detener_falla_las_solicitudes_que_no_se_procesaron():
+    liberar = threading.Event()
+
+    def prediccion_lenta(lote):
+        liberar.wait(5)
+        return lote
+
+    servidor = ServidorLotes(prediccion_lenta, max_lote=1, max_espera=0)
+    en_proceso = servidor.enviar(np.zeros(1))
+    en_cola = servidor.enviar(np.ones(1))
+    servidor.detener(timeout=0.1)
+    with pytest.raises(RuntimeError):
+        en_cola.result(timeout=1)
+    liberar.set()
+    assert en_proceso.result(timeout=5) == 0
@@ -0,0 +1,73 @@
+from tkinter import Label, Button, Toplevel, Frame
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+COLORES = ['#4CAF50', '#FF5722', '#2196F3', '#FFC107', '#9E9E9E']
+
+
+class VistaEstadisticas:
+    """Ventana de estadísticas que se crea una sola vez y se oculta en lugar de destruirse.
+
+    La figura, las barras y sus etiquetas se crean al principio; actualizar()
+    solo cambia la altura de las barras y el texto de las etiquetas, y redibuja
+    cuando Tk está libre. Se usa Figure en lugar de pyplot para que la figura
+    no quede registrada en el estado global de matplotlib.
+    """
+
+    def __init__(self, window, contador):
+        self.contador = contador
+        self.ventana = Toplevel(window)
+        self.ventana.title("Estadísticas")
+        self.ventana.geometry("900x650")
+        self.ventana.configure(bg='#ffffff')
+        self.ventana.protocol("WM_DELETE_WINDOW", self.ocultar)
+
+        header_frame = Frame(self.ventana, bg='#a0e75a', height=80)
+        header_frame.pack(fill="x")
+        title_label = Label(header_frame, text="ESTADÍSTICAS", font=("Arial", 20, "bold"), bg='#a0e75a', fg="black")
+        title_label.pack(pady=10)
+
+        self.figura = Figure(figsize=(6, 4))
+        self.ax = self.figura.add_subplot()
+        residuos = list(contador.keys())
+        self.barras = self.ax.bar(residuos, [0] * len(residuos), color=COLORES)
+        self.etiquetas = [self.ax.text(i, 0, '', ha='center', fontweight='bold') for i in range(len(residuos))]
+        self.ax.set_title('Residuos capturados')
+        self.ax.set_ylabel('Unidades')
+
+        canvas = Frame(self.ventana)
+        canvas.pack()
+        self.canvas = FigureCanvasTkAgg(self.figura, master=canvas)
+        self.canvas.get_tk_widget().pack()
+
+        Button(self.ventana, text="REGRESAR", font=("Arial", 12), bg="#b3f35a", fg="black", bd=0, command=self.ocultar).pack(pady=20)
+
+        self._mostrados = None
+        self.ocultar()
+
+    def visible(self):
+        return self.ventana.winfo_viewable()
+
+    def mostrar(self):
+        self.ventana.deiconify()
+        self.ventana.lift()
+        self.actualizar()
+
+    def ocultar(self):
+        self.ventana.withdraw()
+
+    def actualizar(self):
+        """Función para reflejar en las barras los valores actuales del contador"""
+        cantidades = list(self.contador.values())
+        if cantidades == self._mostrados:
+            return
+        self._mostrados = cantidades
+        maximo = max(cantidades, default=0)
+        margen = max(1, maximo * 0.05)
+        for barra, etiqueta, cantidad in zip(self.barras, self.etiquetas, cantidades):
+            barra.set_height(cantidad)
+            etiqueta.set_y(cantidad + margen / 2)
+            etiqueta.set_text(str(cantidad))
+        self.ax.set_ylim(0, maximo + 2 * margen)
+        self.canvas.draw_idle()
@@ -0,0 +1,144 @@
+import tkinter as tk
+from tkinter import Label, Button, Toplevel, Frame, ttk
+from datetime import datetime
+
+from persistencia import consulta_pagina_historico, clave_siguiente
+
+# Modo de la vista -> granularidad de consulta_pagina_historico
+MODOS = {'Por día': 'd', 'Por hora': 'h', 'Detalle': None}
+
+COLUMNAS_RESUMEN = ['Fecha', 'Plástico', 'Vidrio', 'Papel', 'Metal', 'Otros']
+COLUMNAS_DETALLE = ['Fecha', 'Estación', 'Cámara', 'Clase', 'Confianza']
+
+
+class VistaHistorico:
+    """Ventana de histórico que carga las filas por páginas a medida que se desplaza la tabla.
+
+    Las filas se muestran en un Treeview, que solo dibuja las visibles, y se
+    piden a la base de datos de `tamano_pagina` en `tamano_pagina`: la página
+    siguiente se carga cuando la barra de desplazamiento se acerca al final.
+    Las consultas corren en los hilos de `base_datos` (BaseDatos), así que la
+    ventana y la vista previa siguen respondiendo mientras llega cada página.
+    """
+
+    def __init__(self, window, base_datos, al_regresar, tamano_pagina=200):
+        self.base_datos = base_datos
+        self.tamano_pagina = tamano_pagina
+        self.ventana = Toplevel(window)
+        self.ventana.title("Histórico")
+        self.ventana.geometry("900x650")
+        self.ventana.configure(bg='#ffffff')
+        self.ventana.protocol("WM_DELETE_WINDOW", al_regresar)
+
+        header_frame = Frame(self.ventana, bg='#a0e75a', height=80)
+        header_frame.pack(fill="x")
+        title_label = Label(header_frame, text="HISTORICO", font=("Arial", 20, "bold"), bg='#a0e75a', fg="black")
+        title_label.pack(pady=10)
+
+        filtros = Frame(self.ventana, bg='#ffffff')
+        filtros.pack(pady=10)
+        Label(filtros, text="Desde", font=("Arial", 14), bg='#ffffff', fg="black").grid(row=0, column=0, padx=5)
+        self.desde = tk.Entry(filtros, font=("Arial", 14), width=10)
+        self.desde.insert(0, "DD/MM/YYYY")
+        self.desde.grid(row=0, column=1, padx=5)
+        Label(filtros, text="Hasta", font=("Arial", 14), bg='#ffffff', fg="black").grid(row=0, column=2, padx=5)
+        self.hasta = tk.Entry(filtros, font=("Arial", 14), width=10)
+        self.hasta.insert(0, "DD/MM/YYYY")
+        self.hasta.grid(row=0, column=3, padx=5)
+        self.modo = ttk.Combobox(filtros, values=list(MODOS), state="readonly", width=10, font=("Arial", 12))
+        self.modo.current(0)
+        self.modo.grid(row=0, column=4, padx=5)
+        Button(filtros, text="Buscar", font=("Arial", 12), bg="#b3f35a", fg="black", command=self.buscar).grid(row=0, column=5, padx=5)
+
+        self.mensaje = Label(self.ventana, text="", font=("Arial", 12), bg='#ffffff', fg="black")
+        self.mensaje.pack()
+
+        tabla_frame = Frame(self.ventana, bg='#ffffff')
+        tabla_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        self.barra = ttk.Scrollbar(tabla_frame, orient="vertical")
+        self.tabla = ttk.Treeview(tabla_frame, show="headings", yscrollcommand=self.al_desplazar)
+        self.barra.config(command=self.tabla.yview)
+        self.barra.pack(side="right", fill="y")
+        self.tabla.pack(side="left", fill="both", expand=True)
+
+        Button(self.ventana, text="REGRESAR", font=("Arial", 12), bg="#b3f35a", fg="black", bd=0, command=al_regresar).pack(pady=20)
+
+        self._consulta = None
+        self._busqueda = 0
+        self._cargando = False
+
+    def destruir(self):
+        self._busqueda += 1  # Ignorar las páginas que lleguen después de cerrar
+        self.ventana.destroy()
+
+    def buscar(self):
+        try:
+            desde = datetime.strptime(self.desde.get(), "%d/%m/%Y")
+            hasta = datetime.strptime(self.hasta.get(), "%d/%m/%Y")
+        except ValueError:
+            self.mensaje.config(text="Formato de fecha incorrecto. Usa DD/MM/YYYY.")
+            return
+
+        granularidad = MODOS[self.modo.get()]
+        columnas = COLUMNAS_DETALLE if granularidad is None else COLUMNAS_RESUMEN
+        self.tabla.delete(*self.tabla.get_children())
+        self.tabla.config(columns=columnas)
+        for columna in columnas:
+            self.tabla.heading(columna, text=columna)
+            self.tabla.column(columna, width=140, anchor="center")
+
+        # granularidad, desde, hasta, clave de la página siguiente, quedan más páginas
+        self._consulta = [granularidad, desde, hasta, None, True]
+        self._busqueda += 1
+        self._cargando = False
+        self.mensaje.config(text="")
+        self.cargar_pagina()
+
+    def cargar_pagina(self):
+        granularidad, desde, hasta, clave, hay_mas = self._consulta
+        if not hay_mas or self._cargando:
+            return
+        self._cargando = True
+        if clave is None:
+            self.mensaje.config(text="Buscando...")
+        busqueda = self._busqueda
+        sql, parametros = consulta_pagina_historico(granularidad, desde, hasta, clave, self.tamano_pagina,
+                                                    self.base_datos.dialecto)
+        self.base_datos.consultar(sql, parametros,
+                                  al_terminar=lambda filas: self.mostrar_pagina(busqueda, filas),
+                                  al_fallar=lambda error: self.mostrar_error(busqueda, error))
+
+    def mostrar_error(self, busqueda, error):
+        if busqueda != self._busqueda:
+            return
+        self._cargando = False
+        self.mensaje.config(text=f"No se pudo consultar la base de datos: {error}")
+
+    def mostrar_pagina(self, busqueda, filas):
+        if busqueda != self._busqueda:
+            return  # Respuesta de una búsqueda anterior
+        self._cargando = False
+        granularidad, _, _, clave, _ = self._consulta
+        self._consulta[4] = len(filas) == self.tamano_pagina
+        self.mensaje.config(text="")
+        if not filas:
+            if clave is None:
+                self.mensaje.config(text="No hay registros en ese rango.")
+            return
+        self._consulta[3] = clave_siguiente(granularidad, filas)
+        for fila in filas:
+            self.tabla.insert('', 'end', values=self.formatear(granularidad, fila))
+
+    def formatear(self, granularidad, fila):
+        if granularidad is None:
+            _, momento, estacion, camara, clase, confianza = fila
+            confianza = '' if confianza is None else f"{confianza * 100:.1f}%"
+            return momento.strftime('%Y-%m-%d %H:%M:%S'), estacion, camara, clase, confianza
+        formato = '%Y-%m-%d %H:%M' if granularidad == 'h' else '%Y-%m-%d'
+        return (fila[0].strftime(formato),) + tuple(fila[1:])
+
+    def al_desplazar(self, inicio, fin):
+        self.barra.set(inicio, fin)
+        # Pedir la página siguiente cuando se ve el final de lo cargado
+        if self._consulta is not None and float(fin) >= 0.95:
+            self.cargar_pagina()
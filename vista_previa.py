@@ -0,0 +1,90 @@
+import os
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class VistaPrevia:
+    """Muestra frames BGR de OpenCV en un Label de Tk reutilizando siempre los mismos buffers.
+
+    El frame se reduce primero al espacio disponible (sin agrandarlo nunca) y
+    después se convierte a RGBA; los buffers de numpy, la imagen de PIL y el
+    PhotoImage se crean una sola vez y solo se vuelven a crear si cambia el
+    tamaño de la cámara o el espacio disponible. Por frame quedan dos pasadas
+    de OpenCV sobre la imagen reducida y dos copias (a PIL y a Tk). Con
+    `label=None` no se usa Tk: solo se llenan los buffers y la imagen de PIL,
+    por ejemplo para medir la conversión sin pantalla.
+    """
+
+    def __init__(self, label, ancho_max=None, alto_max=None):
+        self.label = label
+        self.limite = (ancho_max, alto_max)
+        self.tamano = None
+        self._forma_origen = None
+        self._reducido = None
+        self._rgba = None
+        self._imagen = None
+        self.foto = None
+
+    def ajustar_limite(self, ancho_max, alto_max):
+        """Función para cambiar el espacio disponible; los buffers se recrean con el próximo frame"""
+        limite = (max(1, ancho_max), max(1, alto_max))
+        if limite != self.limite:
+            self.limite = limite
+            self._forma_origen = None
+
+    def _tamano_destino(self, ancho, alto):
+        if self.limite[0] is None:
+            return ancho, alto
+        escala = min(self.limite[0] / ancho, self.limite[1] / alto, 1.0)
+        return max(1, int(ancho * escala)), max(1, int(alto * escala))
+
+    def _preparar(self, forma):
+        alto, ancho = forma[:2]
+        self.tamano = self._tamano_destino(ancho, alto)
+        ancho_destino, alto_destino = self.tamano
+        self._reducido = None if self.tamano == (ancho, alto) else np.empty((alto_destino, ancho_destino, 3), np.uint8)
+        self._rgba = np.empty((alto_destino, ancho_destino, 4), np.uint8)
+        # Misma imagen de PIL para todos los frames: frombytes la rellena en su lugar
+        self._imagen = Image.new('RGBA', self.tamano)
+        if self.label is not None:
+            self.foto = ImageTk.PhotoImage('RGBA', self.tamano)
+            self.label.configure(image=self.foto)
+            self.label.image = self.foto
+        self._forma_origen = forma
+
+    def mostrar(self, frame):
+        """Función para dibujar un frame BGR en el Label"""
+        if frame.shape != self._forma_origen:
+            self._preparar(frame.shape)
+        origen = frame
+        if self._reducido is not None:
+            # INTER_AREA se ve apenas mejor en una vista previa pero con escalas no enteras cuesta
+            # unas siete veces más que INTER_LINEAR
+            cv2.resize(frame, self.tamano, dst=self._reducido, interpolation=cv2.INTER_LINEAR)
+            origen = self._reducido
+        cv2.cvtColor(origen, cv2.COLOR_BGR2RGBA, dst=self._rgba)
+        self._imagen.frombytes(self._rgba)
+        if self.foto is not None:
+            self.foto.paste(self._imagen)
+
+
+def cargar_icono(ruta, tamano, carpeta_cache='.cache_iconos'):
+    """Función para abrir una imagen ya reducida a `tamano`.
+
+    La primera vez (o si la original cambió) se reduce con LANCZOS y se guarda
+    en `carpeta_cache`, junto a la original; los arranques siguientes solo
+    leen la copia pequeña.
+    """
+    base, extension = os.path.splitext(os.path.basename(ruta))
+    ruta_cache = os.path.join(os.path.dirname(ruta), carpeta_cache, f"{base}_{tamano[0]}x{tamano[1]}{extension}")
+    if os.path.exists(ruta_cache) and os.path.getmtime(ruta_cache) >= os.path.getmtime(ruta):
+        return Image.open(ruta_cache)
+    reducida = Image.open(ruta).resize(tamano, Image.LANCZOS)
+    try:
+        os.makedirs(os.path.dirname(ruta_cache), exist_ok=True)
+        reducida.save(ruta_cache)
+    except OSError as e:
+        print(f"No se pudo guardar el icono reducido en {ruta_cache}: {e}")
+    return reducida